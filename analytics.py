@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import argparse
+from glob import glob, escape as glob_escape
+
+import numpy as np
+
+from views import iter_rows, party_names
+
+STORE_NAME = ".views-columns.npz"
+# Bump when build_columns or the view parsing behind iter_rows changes, so
+# stores written by older code are rebuilt instead of trusted
+STORE_VERSION = 1
+PERCENTILES = (25, 50, 75, 90, 99)
+
+def build_columns(root):
+    """
+    Flatten root/<party>/<account>.json into columns: one entry per video
+    with its party and account as integer codes into the name tables.
+    Returns a dict of NumPy arrays.
+    """
+    parties, accounts = [], []
+    party_col, account_col, views_col, urls = [], [], [], []
+    for party in party_names(root):
+        folder = os.path.join(root, party)
+        files = sorted(glob(os.path.join(glob_escape(folder), "*.json")))
+        if not files:
+            continue
+        p = len(parties)
+        parties.append(party)
+        for fp in files:
+            a = len(accounts)
+            accounts.append(f"{party}/{os.path.splitext(os.path.basename(fp))[0]}")
+            try:
+                rows = list(iter_rows(fp))
+            except Exception:
+                rows = []
+            for row in rows:
+                party_col.append(p)
+                account_col.append(a)
+                views_col.append(row.views)
+                urls.append(row.url)
+    account_party = np.array([parties.index(a.split("/", 1)[0]) for a in accounts], dtype=np.int32)
+    return {
+        "parties": np.array(parties, dtype=str),
+        "accounts": np.array(accounts, dtype=str),
+        "account_party": account_party,
+        "party": np.array(party_col, dtype=np.int32),
+        "account": np.array(account_col, dtype=np.int32),
+        "views": np.array(views_col, dtype=np.int64),
+        "url": np.array(urls, dtype=str),
+    }
+
+def newest_mtime(root):
+    # Folder mtimes catch deleted and renamed files too
+    newest = 0
+    for folder, _, files in os.walk(root):
+        newest = max(newest, os.stat(folder).st_mtime_ns)
+        for name in files:
+            if name.lower().endswith(".json"):
+                newest = max(newest, os.stat(os.path.join(folder, name)).st_mtime_ns)
+    return newest
+
+def load_columns(root, store=None, rebuild=False):
+    """
+    Load the columnar store, rebuilding it when any JSON file under root is
+    newer than the store or the store was written by another STORE_VERSION.
+    """
+    store = store or os.path.join(root, STORE_NAME)
+    if not rebuild and os.path.exists(store) and os.stat(store).st_mtime_ns >= newest_mtime(root):
+        try:
+            with np.load(store) as data:
+                if "version" in data.files and int(data["version"]) == STORE_VERSION:
+                    return {k: data[k] for k in data.files if k != "version"}
+        except Exception:
+            # Unreadable store: rebuild it
+            pass
+    cols = build_columns(root)
+    np.savez_compressed(store, version=np.int32(STORE_VERSION), **cols)
+    return cols
+
+def group_stats(keys, values, ngroups, percentiles=PERCENTILES):
+    """
+    Vectorized per-group count, sum, mean, min, max and percentiles
+    (linear interpolation, as np.percentile) of values grouped by the
+    integer codes in keys. Groups without values get zeros.
+    """
+    count = np.bincount(keys, minlength=ngroups)
+    has = count > 0
+    out = {"count": count, "sum": np.zeros(ngroups, dtype=values.dtype)}
+    for k in ("mean", "min", "max") + tuple(f"p{q}" for q in percentiles):
+        out[k] = np.zeros(ngroups)
+    if not len(values):
+        return out
+
+    # Sort by (group, value) once; each group is then a contiguous run, so
+    # sums are one reduceat and every percentile is two gathers and a lerp
+    order = np.lexsort((values, keys))
+    sorted_vals = values[order]
+    start = np.concatenate(([0], np.cumsum(count)[:-1]))[has]
+    last = start + count[has] - 1
+    out["sum"][has] = np.add.reduceat(sorted_vals, start)
+    out["mean"][has] = out["sum"][has] / count[has]
+    out["min"][has] = sorted_vals[start]
+    out["max"][has] = sorted_vals[last]
+    as_float = sorted_vals.astype(np.float64)
+    for q in percentiles:
+        pos = start + (count[has] - 1) * (q / 100)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        out[f"p{q}"][has] = as_float[lo] + (as_float[hi] - as_float[lo]) * (pos - lo)
+    return out
+
+def summarize(cols, by="party"):
+    """
+    Per-party or per-account statistics of video views, as a list of dicts
+    sorted by total views.
+    """
+    names = cols["parties"] if by == "party" else cols["accounts"]
+    stats = group_stats(cols[by], cols["views"], len(names))
+    rows = []
+    for i, name in enumerate(names):
+        row = {"name": str(name)}
+        for k, arr in stats.items():
+            v = arr[i]
+            row[k] = int(v) if k in ("count", "sum") else round(float(v), 2)
+        rows.append(row)
+    rows.sort(key=lambda r: r["sum"], reverse=True)
+    return rows
+
+def write_parquet(cols, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Writing Parquet needs pyarrow: pip install pyarrow")
+    table = pa.table({
+        "party": cols["parties"][cols["party"]],
+        "account": cols["accounts"][cols["account"]],
+        "url": cols["url"],
+        "views": cols["views"],
+    })
+    pq.write_table(table, path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized view statistics per party or account.")
+    parser.add_argument("root", nargs="?", default="views", help="folder with <party>/<account>.json files (default: views)")
+    parser.add_argument("--by", choices=["party", "account"], default="party")
+    parser.add_argument("--json", metavar="PATH", help="write the statistics as JSON instead of printing them")
+    parser.add_argument("--parquet", metavar="PATH", help="also export the per-video columns as Parquet (needs pyarrow)")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the columnar store even if it is up to date")
+    args = parser.parse_args()
+
+    cols = load_columns(args.root, rebuild=args.rebuild)
+    if args.parquet:
+        write_parquet(cols, args.parquet)
+        print(f"Wrote {args.parquet} with {len(cols['views'])} videos.")
+
+    rows = summarize(cols, args.by)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+        print(f"Wrote {args.json} with {len(rows)} rows.")
+        return
+
+    cols_out = ["count", "sum", "mean"] + [f"p{q}" for q in PERCENTILES] + ["max"]
+    width = max([len(r["name"]) for r in rows] + [4])
+    print(f"{args.by:<{width}}" + "".join(f"{c:>14}" for c in cols_out))
+    for r in rows:
+        print(f"{r['name']:<{width}}" + "".join(
+            f"{r[c]:>14,}" if isinstance(r[c], int) else f"{r[c]:>14,.1f}" for c in cols_out))
+
+if __name__ == "__main__":
+    main()
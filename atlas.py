@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import os
+import re
+import json
+import hashlib
+import argparse
+from math import ceil, sqrt
+from PIL import Image, ImageOps
+from resize import list_images
+from viewcache import file_hash
+from workers import resolve_jobs, run_tasks
+
+SOURCE_DIR = "logos_extended"
+OUT_DIR = "atlas"
+MANIFEST_NAME = "atlas.json"
+# Avatars are shown at DISPLAY px and stored at twice that for sharp
+# rendering on high-density screens
+DISPLAY = 48
+CELL = DISPLAY * 2
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+# Bumped whenever the packing or the CSS changes, so every atlas is redone
+LAYOUT = 1
+
+def css_name(name):
+    """
+    Account file stem as a CSS class fragment: "bbb.jong" -> "bbb-jong".
+    """
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", name).strip("-") or "x"
+
+def party_digest(paths):
+    """
+    Hash of everything an atlas depends on: the layout settings and the
+    name and content of every image in it.
+    """
+    h = hashlib.sha256(f"{LAYOUT}:{CELL}:{DISPLAY}".encode())
+    for path in paths:
+        h.update(f"\0{os.path.basename(path)}\0{file_hash(path)}".encode())
+    return h.hexdigest()
+
+def build_atlas(party, paths, out_dir):
+    """
+    Pack the avatars of one party into a grid of CELL x CELL squares,
+    written as out_dir/<party>.<ext> for every format, plus the matching
+    out_dir/<party>.css. Returns the manifest entry.
+    """
+    cols = ceil(sqrt(len(paths)))
+    rows = ceil(len(paths) / cols)
+    sheet = Image.new("RGB", (cols * CELL, rows * CELL), "white")
+    sprites = {}
+    for i, path in enumerate(paths):
+        x, y = (i % cols) * CELL, (i // cols) * CELL
+        with Image.open(path) as img:
+            img.draft("RGB", (CELL, CELL))
+            tile = ImageOps.fit(img.convert("RGB"), (CELL, CELL), Image.Resampling.LANCZOS)
+        sheet.paste(tile, (x, y))
+        sprites[os.path.splitext(os.path.basename(path))[0]] = [x * DISPLAY // CELL, y * DISPLAY // CELL]
+
+    os.makedirs(out_dir, exist_ok=True)
+    images = {}
+    for ext, (fmt, options) in FORMATS.items():
+        images[ext] = f"{party}.{ext}"
+        tmp = os.path.join(out_dir, images[ext] + ".tmp")
+        sheet.save(tmp, fmt, **options)
+        os.replace(tmp, os.path.join(out_dir, images[ext]))
+
+    # The sheet is scaled down to DISPLAY px cells, so positions are in
+    # display pixels
+    lines = [
+        f"/* {party}: {len(paths)} avatars. Use <span class=\"avatar-{party} a-NAME\"></span> */",
+        f".avatar-{party} {{",
+        "  display: inline-block;",
+        f"  width: {DISPLAY}px;",
+        f"  height: {DISPLAY}px;",
+        f"  background-image: url({images['jpg']});",
+        f"  background-image: image-set(url({images['webp']}) type(\"image/webp\"), url({images['jpg']}) type(\"image/jpeg\"));",
+        f"  background-size: {cols * DISPLAY}px {rows * DISPLAY}px;",
+        "}",
+    ]
+    for name, (x, y) in sprites.items():
+        lines.append(f".avatar-{party}.a-{css_name(name)} {{ background-position: {-x}px {-y}px; }}")
+    with open(os.path.join(out_dir, f"{party}.css"), "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+    return {"images": images, "css": f"{party}.css", "display": DISPLAY, "cell": CELL,
+            "cols": cols, "rows": rows, "sprites": sprites}
+
+def build_all(source_dir=SOURCE_DIR, out_dir=OUT_DIR, jobs=1, force=False):
+    """
+    One atlas per <party> folder in source_dir. A party is rebuilt only
+    when its digest differs from the manifest or one of its files is gone.
+    Returns (manifest, built, failed).
+    """
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            old = json.load(f)
+    except (OSError, ValueError):
+        old = {}
+
+    manifest, tasks, digests = {}, [], {}
+    for party in sorted(os.listdir(source_dir)):
+        folder = os.path.join(source_dir, party)
+        if not os.path.isdir(folder):
+            continue
+        paths = list_images([folder])
+        if not paths:
+            continue
+        digest = party_digest(paths)
+        prev = old.get(party)
+        if (not force and prev and prev.get("digest") == digest
+                and all(os.path.exists(os.path.join(out_dir, p)) for p in [prev["css"], *prev["images"].values()])):
+            manifest[party] = prev
+            continue
+        tasks.append((party, paths, out_dir))
+        digests[party] = digest
+
+    built = failed = 0
+    for (party, paths, _), entry, error in run_tasks(build_atlas, tasks, jobs):
+        if error:
+            failed += 1
+            print(f"Error packing {party}: {error}")
+            continue
+        built += 1
+        entry["digest"] = digests[party]
+        manifest[party] = entry
+        print(f"Packed {party}: {len(paths)} avatars into {entry['cols']}x{entry['rows']}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    tmp = manifest_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, manifest_path)
+    return manifest, built, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack each party's account avatars into one sprite sheet with CSS.")
+    parser.add_argument("source", nargs="?", default=SOURCE_DIR,
+                        help=f"folder with <party>/ avatar folders (default: {SOURCE_DIR})")
+    parser.add_argument("--out", default=OUT_DIR, help=f"output folder (default: {OUT_DIR})")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="worker processes (default 0 = one per CPU core)")
+    parser.add_argument("--force", action="store_true", help="rebuild every atlas, even unchanged ones")
+    args = parser.parse_args()
+    jobs = resolve_jobs(args.jobs)
+
+    manifest, built, failed = build_all(args.source, args.out, jobs, args.force)
+    print(f"Completed! Packed {built}, {len(manifest) - built} unchanged, {failed} failed.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import argparse
+import subprocess
+from fnmatch import fnmatch
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import grafiek
+import publish
+import resize
+import stats
+import views
+from viewcache import ViewCache
+from workers import call, resolve_jobs, submit
+
+STATE_PATH = ".build-state.json"
+VERSION = 1
+TXT_DIR = "txt"
+STATS_DIR = "stats"
+VIEWS_DIR = "views"
+LOGO_DIR = "logo"
+# Per-party summaries the page targets leave for the overview targets, so
+# the overviews do not parse every input again
+SUMMARY_DIR = os.path.join(".build", "summaries")
+INDEX_PAGE = "index.html"
+# Shared code every page writer goes through; a change to any of it
+# rebuilds the pages
+PAGE_CODE = ["counts.py", "htmlstream.py", "totalviews.py"]
+
+class Target:
+    """
+    One build step: action(*args, **options) reads inputs and writes
+    outputs. options do not change the outputs (worker counts and such), so
+    unlike args they are not part of the signature. deps are the targets
+    producing any of the inputs, filled in by plan().
+    """
+    __slots__ = ("name", "inputs", "outputs", "action", "args", "options", "deps")
+
+    def __init__(self, name, inputs, outputs, action, args=(), options=None):
+        self.name = name
+        self.inputs = list(dict.fromkeys(inputs))
+        self.outputs = outputs
+        self.action = action
+        self.args = args
+        self.options = options or {}
+        self.deps = []
+
+# Actions are module-level so the process pool can pickle them
+
+def scrape_profiles(txt_paths):
+    # One run for every party file: tikip-multi.py scrapes accounts shared
+    # between parties once, keeps a single browser pool and is the only
+    # writer of its cache. --resume skips the profiles that are still fresh.
+    subprocess.run([sys.executable, "tikip-multi.py", "--resume", *txt_paths], check=True)
+
+def summary_path(kind, name):
+    return os.path.join(SUMMARY_DIR, kind, name + ".json")
+
+def write_summary(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def read_summary(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def stats_page(in_path, out_path, summary_out):
+    write_summary(summary_out, stats.build_page(in_path, out_path))
+
+def stats_overview(summary_paths, out_path):
+    stats.write_summary(out_path, [read_summary(p) for p in summary_paths])
+
+def views_page(root, name, summary_out):
+    result = views.build_party(root, name)
+    if result is not None:
+        info, top_rows = result
+        result = {"info": info, "top": [[r.url, r.views, r.source] for r in top_rows]}
+    write_summary(summary_out, result)
+
+def views_overview(root, summary_paths):
+    summaries = {}
+    for name, path in summary_paths:
+        data = read_summary(path)
+        if data is not None:
+            summaries[name] = (data["info"], [views.Row(*r) for r in data["top"]])
+    views.build_overview(root, summaries)
+
+def totals():
+    # The only target that uses views/.viewcache, so parallel view pages
+    # never write it at the same time
+    records = grafiek.collect(VIEWS_DIR, grafiek.CSV_PATH)
+    grafiek.write_totals(grafiek.TOTALS_PATH, records)
+    grafiek.write_csv(grafiek.CSV_PATH, records)
+    grafiek.write_json(grafiek.JSON_PATH, records)
+
+def logos(page):
+    cache = ViewCache(os.path.join(resize.OUT_DIR, resize.MANIFEST_NAME))
+    manifest, _, failed = resize.build_variants([LOGO_DIR], resize.OUT_DIR, cache=cache)
+    cache.save()
+    resize.rewrite_html(page, manifest)
+    if failed:
+        raise RuntimeError(f"{failed} logos could not be converted")
+
+def publish_site(out_dir, jobs=1):
+    rows, failed = publish.publish(out_dir, jobs)
+    saved = sum(size - min(s for s in sizes if s is not None) for _, size, *sizes in rows)
+    print(f"Published {len(rows)} files to {out_dir}, {saved:,} bytes saved by compression.")
+    if failed:
+        raise RuntimeError(f"{failed} files could not be compressed")
+
+def list_files(folder, exts):
+    try:
+        return sorted(os.path.join(folder, n) for n in os.listdir(folder) if n.lower().endswith(exts))
+    except OSError:
+        return []
+
+def targets(scrape=False, publish_to=None, jobs=1):
+    """
+    The dependency graph of the site:
+      txt/<party>.txt -> txt/<party>.json -> stats/<party>.html + summary -> stats/overview.html
+      views/<party>/*.json -> views/<party>.html + summary -> views/overview.html
+                           -> totals.txt, the seats CSV, grafiek.json (read by grafiek.html)
+      logo/* -> resized/logo/* -> the <picture> tags in index.html
+      every page and the assets they link -> publish_to (publish.py)
+    Each page target also writes its party's summary to SUMMARY_DIR, which
+    the overview reads instead of parsing the inputs again.
+    Profiles are only scraped with scrape set; otherwise stats pages are
+    built for the profile JSON already in txt/. The site is only copied
+    for publishing with publish_to set, compressing on jobs processes.
+    """
+    out = []
+    profiles = list(filter(stats.is_profiles_file, list_files(TXT_DIR, (".json",))))
+    if scrape:
+        txts = list_files(TXT_DIR, (".txt",))
+        scraped = [os.path.splitext(p)[0] + ".json" for p in txts]
+        if txts:
+            out.append(Target("profiles", txts, scraped, scrape_profiles, (txts,)))
+        profiles = sorted(set(profiles) | set(scraped))
+    stats_summaries = []
+    for in_path in profiles:
+        party = os.path.splitext(os.path.basename(in_path))[0]
+        out_path = os.path.join(STATS_DIR, party + ".html")
+        summary = summary_path("stats", party)
+        stats_summaries.append(summary)
+        out.append(Target(f"stats:{party}", [in_path, "stats.py", *PAGE_CODE], [out_path, summary],
+                          stats_page, (in_path, out_path, summary)))
+    if profiles:
+        out.append(Target("stats-overview", [*stats_summaries, "stats.py", *PAGE_CODE],
+                          [os.path.join(STATS_DIR, "overview.html")],
+                          stats_overview, (stats_summaries, os.path.join(STATS_DIR, "overview.html"))))
+
+    views_summaries, all_views = [], []
+    for name in views.party_names(VIEWS_DIR):
+        files = list_files(os.path.join(VIEWS_DIR, name), (".json",))
+        if not files:
+            continue
+        all_views.extend(files)
+        summary = summary_path("views", name)
+        views_summaries.append((name, summary))
+        out.append(Target(f"views:{name}", [*files, "views.py", *PAGE_CODE],
+                          [os.path.join(VIEWS_DIR, name + ".html"), summary], views_page, (VIEWS_DIR, name, summary)))
+    out.append(Target("views-overview", [*(p for _, p in views_summaries), "views.py", *PAGE_CODE],
+                      [os.path.join(VIEWS_DIR, "overview.html")], views_overview, (VIEWS_DIR, views_summaries)))
+    out.append(Target("totals", [*all_views, grafiek.CSV_PATH, "grafiek.py", "viewcache.py", *PAGE_CODE],
+                      [grafiek.TOTALS_PATH, grafiek.CSV_PATH, grafiek.JSON_PATH], totals))
+
+    out.append(Target("logos", [*list_files(LOGO_DIR, resize.IMAGE_EXTS), INDEX_PAGE, "resize.py", "viewcache.py"],
+                      [os.path.join(resize.OUT_DIR, resize.VARIANTS_MANIFEST), INDEX_PAGE], logos, (INDEX_PAGE,)))
+
+    if publish_to:
+        # The assets themselves are covered by the files listing them: a
+        # logo variant changes logos.json, the chart data is grafiek.json
+        pages, chunk_files, extra = publish.source_files()
+        out.append(Target("publish", [*pages, *chunk_files, *extra, grafiek.JSON_PATH,
+                                      os.path.join(resize.OUT_DIR, resize.VARIANTS_MANIFEST), "publish.py"],
+                          [os.path.join(publish_to, publish.MANIFEST_NAME)], publish_site, (publish_to,),
+                          {"jobs": jobs}))
+    return out
+
+def plan(all_targets, patterns=()):
+    """
+    Link every target to the targets producing its inputs and keep the ones
+    matching patterns (all without patterns) plus everything they depend on.
+    Returns the kept targets in dependency order.
+    """
+    producer = {}
+    for t in all_targets:
+        for path in t.outputs:
+            producer.setdefault(path, t)
+    for t in all_targets:
+        t.deps = list(dict.fromkeys(producer[p] for p in t.inputs if p in producer and producer[p] is not t))
+
+    order, seen = [], set()
+
+    def visit(t, stack=()):
+        if t.name in stack:
+            raise SystemExit(f"Dependency cycle: {' -> '.join(stack + (t.name,))}")
+        if t.name in seen:
+            return
+        for d in t.deps:
+            visit(d, stack + (t.name,))
+        seen.add(t.name)
+        order.append(t)
+
+    for t in all_targets:
+        if not patterns or any(fnmatch(t.name, p) for p in patterns):
+            visit(t)
+    return order
+
+def signature(t, paths):
+    """
+    (size, mtime_ns) of paths, None for missing ones, plus the target's
+    arguments. Stat calls only, so checking an up-to-date tree is cheap.
+    """
+    files = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            files[path] = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            files[path] = None
+    return {"args": repr(t.args), "files": files}
+
+def is_stale(t, state):
+    """
+    A target is stale when it was never built, an output is missing, or
+    its inputs or arguments changed since its last successful build.
+    """
+    if any(not os.path.exists(p) for p in t.outputs):
+        return True
+    return state.get(t.name) != signature(t, t.inputs)
+
+def load_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == VERSION:
+            return data.get("targets", {})
+    except (OSError, ValueError, AttributeError):
+        pass
+    return {}
+
+def save_state(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": VERSION, "targets": state}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def build(order, state, jobs=1, force=False, dry_run=False):
+    """
+    Run the stale targets of order, each as soon as everything it depends
+    on is done, up to jobs at a time. A target whose dependency failed is
+    skipped. Returns (built, up_to_date, failed).
+    """
+    pending = {t.name: t for t in order}
+    done, failed_names = set(), set()
+    built = fresh = failed = 0
+    running = {}
+    rebuilt = set()
+
+    def ready():
+        for t in list(pending.values()):
+            if all(d.name in done or d.name in failed_names for d in t.deps):
+                del pending[t.name]
+                yield t
+
+    ex = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        while pending or running:
+            for t in ready():
+                if any(d.name in failed_names for d in t.deps):
+                    failed += 1
+                    failed_names.add(t.name)
+                    print(f"Skipped {t.name}: a dependency failed", file=sys.stderr)
+                    continue
+                # Inputs a target rewrites itself (the seats CSV, index.html)
+                # are recorded after it ran, so it does not rebuild forever
+                before = signature(t, [p for p in t.inputs if p not in t.outputs])
+                if not (force or is_stale(t, state) or (dry_run and any(d.name in rebuilt for d in t.deps))):
+                    fresh += 1
+                    done.add(t.name)
+                    continue
+                if dry_run:
+                    rebuilt.add(t.name)
+                    done.add(t.name)
+                    built += 1
+                    print(f"Would build {t.name}")
+                    continue
+                print(f"Building {t.name}")
+                if ex is None:
+                    running[t.name] = (t, before, call(t.action, t.args, t.options))
+                else:
+                    running[submit(ex, t.action, t.args, t.options)] = (t, before, None)
+            if not running:
+                continue
+
+            if ex is None:
+                finished = list(running)
+            else:
+                finished, _ = wait([f for f in running], return_when=FIRST_COMPLETED)
+            for key in finished:
+                t, before, result = running.pop(key)
+                _, error = key.result() if ex is not None else result
+                if error:
+                    failed += 1
+                    failed_names.add(t.name)
+                    state.pop(t.name, None)
+                    print(f"Error building {t.name}: {error}", file=sys.stderr)
+                    continue
+                built += 1
+                done.add(t.name)
+                after = signature(t, [p for p in t.inputs if p in t.outputs])
+                state[t.name] = {"args": before["args"], "files": {
+                    p: (before["files"] if p in before["files"] else after["files"])[p] for p in t.inputs}}
+    finally:
+        if ex is not None:
+            ex.shutdown()
+    return built, fresh, failed
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the site: every page, data file and logo variant whose inputs changed since the last build.")
+    parser.add_argument("targets", nargs="*", metavar="TARGET",
+                        help="only build targets matching these patterns and what they depend on, "
+                             "e.g. 'views:*' or totals (default: everything)")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="targets built at the same time (default 0 = one per CPU core)")
+    parser.add_argument("--force", action="store_true", help="rebuild every selected target, even up-to-date ones")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="only print what would be built")
+    parser.add_argument("--scrape", action="store_true",
+                        help="also scrape every txt/<party>.txt into txt/<party>.json, in one tikip-multi.py --resume run")
+    parser.add_argument("--publish", nargs="?", const=publish.OUT_DIR, metavar="DIR",
+                        help=f"finally copy the site to DIR (default: {publish.OUT_DIR}) with hashed asset names "
+                             "and .gz/.br siblings, see publish.py")
+    parser.add_argument("--list", action="store_true", help="print the targets and their dependencies and exit")
+    args = parser.parse_args()
+    jobs = resolve_jobs(args.jobs)
+
+    order = plan(targets(args.scrape, args.publish, jobs), args.targets)
+    if not order:
+        parser.error(f"no target matches {' '.join(args.targets)}")
+    if args.list:
+        for t in order:
+            print(f"{t.name}: {len(t.inputs)} inputs -> {', '.join(t.outputs)}"
+                  + (f" (after {', '.join(d.name for d in t.deps)})" if t.deps else ""))
+        return
+
+    state = load_state(STATE_PATH)
+    built, fresh, failed = build(order, state, jobs, args.force, args.dry_run)
+    if not args.dry_run:
+        save_state(STATE_PATH, state)
+    print(f"{'Would build' if args.dry_run else 'Built'} {built}, {fresh} up to date, {failed} failed.")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Shared parser for the counts we scrape: views, followers, hearts, ...
+
+Accepts ints, floats and strings such as "32439", "32,439", "32.439",
+"12 345", "1,4K", "1.4k", "2M" or "1.2B". Thousands separators may be
+",", ".", spaces (including no-break and thin spaces) or apostrophes. With
+both "," and "." present the last one is the decimal mark. A single ","
+or "." followed by exactly three digits is a thousands separator, unless a
+K/M/B suffix follows or the integer part is 0. Fractions are truncated
+towards zero, as int() does.
+
+"", "N/A", "-" and None mean "no value" and give the default quietly.
+Anything else that does not parse also gives the default, but is appended
+to the `errors` list when one is passed, so callers can report it.
+
+Run this file to benchmark it against the old per-script parsers.
+"""
+import re
+import math
+
+SUFFIXES = {"": 1, "k": 1_000, "m": 1_000_000, "b": 1_000_000_000}
+EMPTY = frozenset({"", "n/a", "na", "-", "none", "null"})
+
+# Spaces, no-break/thin spaces and apostrophes only ever group digits
+_DROP = str.maketrans("", "", "    '’")
+_NUMBER = re.compile(r"([+-]?)(\d[\d.,]*)([kmb]?)", re.IGNORECASE)
+_GROUPED = re.compile(r"\d{1,3}(?:([.,])\d{3})(?:\1\d{3})*")
+
+def _split(digits, has_suffix):
+    """
+    Split "1.234,5"-style digits into (integer digits, fraction digits), or
+    None when the separators are inconsistent.
+    """
+    last_dot = digits.rfind(".")
+    last_comma = digits.rfind(",")
+    if last_dot < 0 and last_comma < 0:
+        return digits, ""
+    if last_dot >= 0 and last_comma >= 0:
+        dec = max(last_dot, last_comma)
+        group = "," if dec == last_dot else "."
+        int_part, frac = digits[:dec], digits[dec + 1:]
+        if not frac.isdigit() or (group == "," and "." in int_part) or (group == "." and "," in int_part):
+            return None
+        if not _GROUPED.fullmatch(int_part) and not int_part.isdigit():
+            return None
+        return int_part.replace(group, ""), frac
+    sep = "." if last_dot >= 0 else ","
+    parts = digits.split(sep)
+    if len(parts) > 2:
+        return ("".join(parts), "") if _GROUPED.fullmatch(digits) else None
+    int_part, frac = parts
+    if not int_part or not frac:
+        return None
+    if len(frac) == 3 and not has_suffix and int_part != "0" and len(int_part) <= 3:
+        return int_part + frac, ""
+    return int_part, frac
+
+def parse_count(value, default=0, errors=None):
+    """
+    Convert one scraped count to an int. See the module docstring for the
+    accepted formats.
+    """
+    if value is None:
+        return default
+    if isinstance(value, int):
+        return int(value)
+    if isinstance(value, float):
+        if math.isfinite(value):
+            return int(value)
+        if errors is not None:
+            errors.append(value)
+        return default
+    s = str(value).strip()
+    # Fast path: the bulk of our data is plain digits
+    if s.isdigit() and s.isascii():
+        return int(s)
+    s = s.translate(_DROP)
+    if s.lower() in EMPTY:
+        return default
+    m = _NUMBER.fullmatch(s)
+    if m:
+        sign, digits, suffix = m.groups()
+        split = _split(digits, bool(suffix))
+        if split is not None:
+            int_part, frac = split
+            mult = SUFFIXES[suffix.lower()]
+            n = int(int_part) * mult + (int(frac) * mult // 10 ** len(frac) if frac else 0)
+            return -n if sign == "-" else n
+    else:
+        # Exponent notation such as "1e3" still parses as before
+        try:
+            f = float(s)
+            if math.isfinite(f):
+                return int(f)
+        except ValueError:
+            pass
+    if errors is not None:
+        errors.append(value)
+    return default
+
+def parse_counts(values, default=0, errors=None):
+    """
+    Parse a whole column of counts at once. Returns a list of ints.
+    """
+    out = []
+    append = out.append
+    for v in values:
+        # Inline the fast paths to skip a call per plain value
+        if type(v) is int:
+            append(v)
+        elif type(v) is str and v.isdigit() and v.isascii():
+            append(int(v))
+        else:
+            append(parse_count(v, default, errors))
+    return out
+
+def _legacy_parse_views(value):
+    # The parser views.py and totalviews.py used to carry, for the benchmark
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    s = str(value).strip()
+    s = s.replace(",", "").replace(" ", "")
+    if not s:
+        return 0
+    low = s.lower()
+    try:
+        if low.endswith('k'):
+            return int(float(low[:-1]) * 1_000)
+        if low.endswith('m'):
+            return int(float(low[:-1]) * 1_000_000)
+        return int(float(low))
+    except ValueError:
+        return 0
+
+def bench(n=200_000):
+    """
+    Time the legacy parser, parse_count and parse_counts on a column shaped
+    like our view dumps (mostly digit strings, some separators and
+    suffixes) and print the results.
+    """
+    import random
+    import timeit
+    rng = random.Random(42)
+    pool = [str(rng.randint(0, 999_999)) for _ in range(90)]
+    pool += ["32,439", "1,234,567", "12 345", "1.4K", "25k", "2M", "N/A", "", 1234, 56.0]
+    column = [rng.choice(pool) for _ in range(n)]
+
+    timings = {
+        "legacy parse_views": lambda: [_legacy_parse_views(v) for v in column],
+        "parse_count": lambda: [parse_count(v) for v in column],
+        "parse_counts": lambda: parse_counts(column),
+    }
+    print(f"{n:,} values, best of 5:")
+    for name, fn in timings.items():
+        best = min(timeit.repeat(fn, number=1, repeat=5))
+        print(f"  {name:<20}{best * 1000:8.1f} ms  {best / n * 1e9:6.0f} ns/value")
+
+if __name__ == "__main__":
+    bench()
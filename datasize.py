@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+import os
+import json
+import argparse
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+CACHE_NAME = ".datasize"
+VERSION = 1
+# File size histogram: bucket i holds sizes below HIST_EDGES[i]
+HIST_EDGES = (1 << 10, 1 << 20, 10 << 20, 100 << 20, 1 << 30)
+HIST_LABELS = ("<1 KB", "1 KB-1 MB", "1-10 MB", "10-100 MB", "100 MB-1 GB", ">=1 GB")
+
+def format_size(n):
+    for unit, div in (("GB", 1 << 30), ("MB", 1 << 20), ("KB", 1 << 10)):
+        if n >= div:
+            return f"{n / div:.1f} {unit}"
+    return f"{n} B"
+
+def scan_dir(path, cached=None):
+    """
+    Sizes of the files directly in path, from os.scandir, as {"mtime_ns",
+    "files", "bytes", "hist", "dirs"}. A cached entry with the same
+    directory mtime is returned as is: adding, removing or renaming a file
+    changes the mtime, so only directories that changed are listed again.
+    Returns (entry, hit).
+    """
+    mtime = os.stat(path).st_mtime_ns
+    if cached and cached["mtime_ns"] == mtime:
+        return cached, True
+    files = total = 0
+    hist = [0] * len(HIST_LABELS)
+    dirs = []
+    with os.scandir(path) as it:
+        for e in it:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    dirs.append(e.name)
+                elif e.is_file(follow_symlinks=False):
+                    size = e.stat(follow_symlinks=False).st_size
+                    files += 1
+                    total += size
+                    hist[bisect_right(HIST_EDGES, size)] += 1
+            except OSError:
+                continue
+    return {"mtime_ns": mtime, "files": files, "bytes": total, "hist": hist, "dirs": sorted(dirs)}, False
+
+class SizeCache:
+    """
+    Persistent per-directory scan results of one root, keyed by path
+    relative to it. Directories not seen in a scan are dropped on save, and
+    a cache written for another root is ignored.
+    """
+
+    def __init__(self, path, root):
+        self.path = path
+        self.root = os.path.abspath(root)
+        self.dirs = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == VERSION and data.get("root") == self.root:
+                self.dirs = data.get("dirs", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def save(self, dirs):
+        self.dirs = dirs
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "root": self.root, "dirs": dirs}, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+def scan_tree(root, cache=None, workers=16):
+    """
+    Scan every directory under root on a thread pool, each directory as
+    soon as its parent is listed. Returns ({relpath: entry}, hits, misses);
+    relpath is "." for root itself.
+    """
+    old = cache.dirs if cache is not None else {}
+    dirs = {}
+    hits = misses = 0
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending = {ex.submit(scan_dir, root, old.get(".")): "."}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                rel = pending.pop(fut)
+                try:
+                    entry, hit = fut.result()
+                except OSError:
+                    continue
+                dirs[rel] = entry
+                hits += hit
+                misses += not hit
+                for name in entry["dirs"]:
+                    child = name if rel == "." else f"{rel}/{name}"
+                    pending[ex.submit(scan_dir, os.path.join(root, child), old.get(child))] = child
+    return dirs, hits, misses
+
+def totals_by_depth(dirs, depth):
+    """
+    Add up the scan per directory `depth` levels below root: 1 gives
+    <party>, 2 gives <party>/<account>. Files higher up than depth are
+    left out. Returns {name: {"files", "bytes", "hist"}}.
+    """
+    out = {}
+    for rel, entry in dirs.items():
+        parts = [] if rel == "." else rel.split("/")
+        if len(parts) < depth:
+            continue
+        key = "/".join(parts[:depth])
+        t = out.setdefault(key, {"files": 0, "bytes": 0, "hist": [0] * len(HIST_LABELS)})
+        t["files"] += entry["files"]
+        t["bytes"] += entry["bytes"]
+        t["hist"] = [a + b for a, b in zip(t["hist"], entry["hist"])]
+    # Parties without any files still show up, with zeros
+    if depth == 1:
+        for name in dirs.get(".", {}).get("dirs", []):
+            out.setdefault(name, {"files": 0, "bytes": 0, "hist": [0] * len(HIST_LABELS)})
+    return dict(sorted(out.items()))
+
+def party_sizes(root, cache_path=None, workers=16):
+    """
+    Bytes per <party> folder under root, reusing and updating the stat cache
+    at cache_path when given.
+    """
+    cache = SizeCache(cache_path, root) if cache_path else None
+    dirs, _, _ = scan_tree(root, cache, workers)
+    if cache is not None:
+        cache.save(dirs)
+    return {name: t["bytes"] for name, t in totals_by_depth(dirs, 1).items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-party and per-account size of the downloaded media.")
+    parser.add_argument("root", help="folder with <party>/<account>/ media")
+    parser.add_argument("--by", choices=["party", "account"], default="party")
+    parser.add_argument("--workers", type=int, default=16, help="threads listing directories (default: 16)")
+    parser.add_argument("--cache", default=CACHE_NAME,
+                        help=f"stat cache reused between runs (default: {CACHE_NAME})")
+    parser.add_argument("--no-cache", action="store_true", help="list every directory and leave the cache alone")
+    parser.add_argument("--json", metavar="PATH", help="also write the totals and histograms as JSON")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else SizeCache(args.cache, args.root)
+    dirs, hits, misses = scan_tree(args.root, cache, args.workers)
+    if cache is not None:
+        cache.save(dirs)
+    totals = totals_by_depth(dirs, 1 if args.by == "party" else 2)
+    grand = sum(t["bytes"] for t in totals.values())
+
+    width = max([len(k) for k in totals] + [len(args.by)])
+    print(f"{args.by:<{width}}{'files':>9}{'size':>11}{'share':>8}  " + "".join(f"{l:>13}" for l in HIST_LABELS))
+    for name, t in sorted(totals.items(), key=lambda kv: kv[1]["bytes"], reverse=True):
+        share = 100 * t["bytes"] / grand if grand else 0.0
+        print(f"{name:<{width}}{t['files']:>9,}{format_size(t['bytes']):>11}{share:>7.2f}%  "
+              + "".join(f"{n:>13,}" for n in t["hist"]))
+    print(f"\n{sum(t['files'] for t in totals.values()):,} files, {format_size(grand)} "
+          f"({len(dirs)} directories, {hits} unchanged, {misses} listed)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"by": args.by, "histogram_edges": list(HIST_EDGES), "histogram_labels": list(HIST_LABELS),
+                       "totals": totals}, f, ensure_ascii=False, indent=1)
+
+if __name__ == "__main__":
+    main()
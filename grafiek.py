@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+import os
+import re
+import csv
+import json
+import argparse
+from datasize import CACHE_NAME as SIZE_CACHE, party_sizes
+from totalviews import scan_folders
+from viewcache import MANIFEST_NAME, ViewCache
+from views import party_names
+from workers import resolve_jobs
+
+VIEWS_DIR = "views"
+CSV_PATH = "Party-Seats-DataSize-Percentage.csv"
+TOTALS_PATH = "totals.txt"
+JSON_PATH = "grafiek.json"
+CSV_HEADER = ["Party", "Seats", "Data Size", "Percentage"]
+UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+def parse_size(text):
+    """
+    "5.4 GB" -> bytes, with binary units as the chart has always used.
+    """
+    m = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?B)\s*", text or "", re.IGNORECASE)
+    if not m:
+        return 0
+    return int(float(m.group(1)) * UNITS[m.group(2).upper()])
+
+def format_size(n):
+    if n >= UNITS["GB"]:
+        return f"{n / UNITS['GB']:.1f} GB"
+    return f"{n / UNITS['MB']:.1f} MB"
+
+def read_seats_csv(path):
+    """
+    Rows of the seats CSV as {party: {"seats", "data_bytes"}}, in file
+    order. Reads both a proper CSV and the old export where every line was
+    one quoted field with doubled quotes inside.
+    """
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            lines = list(csv.reader(f))
+    except OSError:
+        return {}
+    rows = {}
+    for fields in lines:
+        if len(fields) == 1:
+            fields = next(csv.reader([fields[0]]))
+        if not fields or fields[0] == CSV_HEADER[0]:
+            continue
+        party = fields[0].strip()
+        seats = int(fields[1]) if len(fields) > 1 and fields[1].strip().isdigit() else 0
+        size = parse_size(fields[2]) if len(fields) > 2 else 0
+        rows[party] = {"seats": seats, "data_bytes": size}
+    return rows
+
+def collect(views_dir=VIEWS_DIR, csv_path=CSV_PATH, media_dir=None, jobs=1, cache=True):
+    """
+    One record per party: views and accounts from views_dir, seats from the
+    seats CSV, data size from media_dir when given and otherwise from the
+    CSV. Parties keep their order in the CSV; new ones are appended.
+    """
+    known = read_seats_csv(csv_path)
+    folders = party_names(views_dir)
+    vc = ViewCache(os.path.join(views_dir, MANIFEST_NAME)) if cache else None
+    per_folder = scan_folders([os.path.join(views_dir, p) for p in folders], jobs, vc)
+    if vc is not None:
+        vc.save()
+    sizes = party_sizes(media_dir, SIZE_CACHE if cache else None) if media_dir else {}
+
+    records = []
+    for party in list(known) + [p for p in folders if p not in known] + [p for p in sizes if p not in known and p not in folders]:
+        info = per_folder.get(os.path.join(views_dir, party), {"total": 0, "files": 0})
+        prev = known.get(party, {"seats": 0, "data_bytes": 0})
+        records.append({
+            "party": party,
+            "views": info["total"],
+            "accounts": info["files"],
+            "seats": prev["seats"],
+            "data_bytes": sizes.get(party, 0) if media_dir else prev["data_bytes"],
+        })
+    total_bytes = sum(r["data_bytes"] for r in records)
+    for r in records:
+        r["data_gb"] = round(r["data_bytes"] / UNITS["GB"], 4)
+        r["percentage"] = round(100 * r["data_bytes"] / total_bytes, 2) if total_bytes else 0.0
+    return records
+
+def write_totals(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(
+            f"{r['party']}: {r['views']:,} views from {r['accounts']} account{'' if r['accounts'] == 1 else 's'}"
+            for r in records
+        ) + "\n")
+
+def write_csv(path, records):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, lineterminator="\n")
+        w.writerow(CSV_HEADER)
+        for r in records:
+            w.writerow([r["party"], r["seats"], format_size(r["data_bytes"]), f"{r['percentage']:.2f}%"])
+
+def write_json(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"parties": records}, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Regenerate totals.txt, the seats CSV and grafiek.json (the data behind grafiek.html).")
+    parser.add_argument("--views", default=VIEWS_DIR, help=f"folder with <party>/ view dumps (default: {VIEWS_DIR})")
+    parser.add_argument("--media", metavar="DIR",
+                        help="folder with the downloaded media per <party>/; without it the data sizes "
+                             "already in the CSV are kept")
+    parser.add_argument("--csv", default=CSV_PATH, help=f"seats CSV, read for the seats and written back (default: {CSV_PATH})")
+    parser.add_argument("--totals", default=TOTALS_PATH, help=f"views and accounts per party as text (default: {TOTALS_PATH})")
+    parser.add_argument("--json", default=JSON_PATH, help=f"data file fetched by grafiek.html (default: {JSON_PATH})")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="worker processes for parsing the views (0 = one per CPU core)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse every views file and list every media folder, leaving the caches alone")
+    args = parser.parse_args()
+    jobs = resolve_jobs(args.jobs)
+
+    records = collect(args.views, args.csv, args.media, jobs, not args.no_cache)
+    write_totals(args.totals, records)
+    write_csv(args.csv, records)
+    write_json(args.json, records)
+    print(f"Wrote {args.totals}, {args.csv} and {args.json} for {len(records)} parties.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+import os
+import json
+import shutil
+from html import escape
+from itertools import islice
+from urllib.parse import quote
+
+ROWS_PER_WRITE = 1024
+
+def write_joined(f, parts, sep="", batch=ROWS_PER_WRITE):
+    """
+    Write sep.join(parts) to the text file f, `batch` parts per write, so
+    the joined text never exists as a whole. parts may be any iterable and
+    is consumed once.
+    """
+    chunk = []
+    lead = ""
+    for part in parts:
+        chunk.append(part)
+        if len(chunk) >= batch:
+            f.write(lead + sep.join(chunk))
+            lead = sep
+            chunk.clear()
+    if chunk:
+        f.write(lead + sep.join(chunk))
+
+PAGE_ROWS = 200
+ROWS_SUFFIX = ".rows"
+
+def rows_dir(out_path):
+    """
+    Folder for the JSON row chunks of the page at out_path, e.g.
+    stats/fvd.html -> stats/fvd.rows.
+    """
+    return os.path.splitext(out_path)[0] + ROWS_SUFFIX
+
+def write_paged_rows(f, rows, html_row, cells, chunk_dir=None, sep="", page_rows=PAGE_ROWS):
+    """
+    Write the first page_rows rows to f as html_row(row) joined by sep, and
+    every further page_rows rows to chunk_dir/<page>.json (pages numbered
+    from 2) as a compact JSON array of cells(row). Without chunk_dir all
+    rows go to f. Chunks left over from an earlier run are removed, so a
+    table that fits on one page leaves no files behind.
+    Returns (pages, row_count).
+    """
+    if chunk_dir is None:
+        count = 0
+
+        def counted():
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield html_row(row)
+
+        write_joined(f, counted(), sep)
+        return 1, count
+
+    shutil.rmtree(chunk_dir, ignore_errors=True)
+    it = iter(rows)
+    first = list(islice(it, page_rows))
+    write_joined(f, map(html_row, first), sep)
+    pages, count = 1, len(first)
+    while True:
+        chunk = [cells(row) for row in islice(it, page_rows)]
+        if not chunk:
+            break
+        pages += 1
+        count += len(chunk)
+        os.makedirs(chunk_dir, exist_ok=True)
+        with open(os.path.join(chunk_dir, f"{pages}.json"), "w", encoding="utf-8") as cf:
+            json.dump(chunk, cf, ensure_ascii=False, separators=(",", ":"))
+    return pages, count
+
+# Swaps the tbody of the table right before the pager between the static
+# first page and rows fetched from the chunk files. Cells are built with
+# textContent, so chunk data never goes through the HTML parser.
+PAGER_SCRIPT = """<script>
+(nav => {
+  const body = nav.previousElementSibling.tBodies[0];
+  const first = body.innerHTML;
+  const cols = nav.dataset.columns.split(",");
+  const pages = +nav.dataset.pages;
+  const loaded = {};
+  const [prev, label, next] = nav.children;
+  let page = 1;
+  const cell = (type, v) => {
+    const td = document.createElement("td");
+    if (type === "num") {
+      td.textContent = Number(v).toLocaleString("en-US");
+    } else if (type === "link") {
+      const a = td.appendChild(document.createElement("a"));
+      a.href = v;
+      a.target = "_blank";
+      a.rel = "noopener noreferrer";
+      a.textContent = v;
+    } else {
+      td.textContent = v;
+    }
+    return td;
+  };
+  const render = rows => {
+    const frag = document.createDocumentFragment();
+    for (const r of rows) {
+      const tr = frag.appendChild(document.createElement("tr"));
+      r.forEach((v, i) => tr.appendChild(cell(cols[i], v)));
+    }
+    body.replaceChildren(frag);
+  };
+  const show = async p => {
+    page = p;
+    prev.disabled = p === 1;
+    next.disabled = p === pages;
+    label.textContent = `Page ${p} of ${pages} (${(+nav.dataset.total).toLocaleString("en-US")} rows)`;
+    if (p === 1) {
+      body.innerHTML = first;
+      return;
+    }
+    if (!loaded[p]) {
+      const res = await fetch(`${nav.dataset.rows}${p}.json`);
+      loaded[p] = await res.json();
+    }
+    if (page === p) render(loaded[p]);
+  };
+  prev.onclick = () => show(page - 1);
+  next.onclick = () => show(page + 1);
+  show(1);
+})(document.currentScript.previousElementSibling);
+</script>
+"""
+
+def pager_html(chunk_dir, pages, count, columns, indent="  "):
+    """
+    Navigation for a table written by write_paged_rows, to be placed right
+    after its </table>. columns gives each cell's type: "text", "num" or
+    "link". Empty when the table fits on one page.
+    """
+    if pages < 2:
+        return ""
+    url = quote(os.path.basename(chunk_dir)) + "/"
+    return (
+        f"{indent}<nav class=\"pager\" style=\"margin: 12px 0\" data-rows=\"{escape(url)}\" data-pages=\"{pages}\" "
+        f"data-total=\"{count}\" data-columns=\"{','.join(columns)}\">"
+        f"<button type=\"button\">&larr; Previous</button> <span></span> <button type=\"button\">Next &rarr;</button></nav>\n"
+        + PAGER_SCRIPT
+    )
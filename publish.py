@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+import os
+import re
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+from glob import glob
+from PIL import Image
+from htmlstream import rows_dir
+from datasize import format_size
+from workers import resolve_jobs, run_tasks
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+OUT_DIR = "dist"
+PAGES = ("*.html", "stats/*.html", "views/*.html")
+# Published at their own URL, so they keep their name
+EXTRA = ("*.png",)
+HASH_EXTS = (".png", ".jpg", ".jpeg", ".webp", ".avif", ".gif", ".svg", ".css", ".js", ".json")
+# Images are already compressed; gzip or brotli would only add bytes
+COMPRESS_EXTS = (".html", ".json", ".css", ".js", ".svg", ".txt", ".csv")
+# Below this the compressed copy is hardly smaller and costs a request header
+MIN_SIZE = 256
+MANIFEST_NAME = "assets.json"
+
+# Where a page can reference an asset: src/href/srcset/style attributes of
+# a tag, url() in CSS and string literals in scripts. Text and data-*
+# attributes are left alone.
+_SCRIPT_STYLE = re.compile(r"(<(script|style)\b[^>]*>)(.*?)(</\2\s*>)", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[A-Za-z][^>]*>")
+_URL_ATTR = re.compile(r"""(?<![\w-])(src|href|srcset|style)(\s*=\s*)(["'])(.*?)\3""", re.IGNORECASE | re.DOTALL)
+_CSS_URL = re.compile(r"""(url\(\s*)(["']?)([^"')]+)\2(\s*\))""", re.IGNORECASE)
+_JS_STRING = re.compile(r"""(["'])([^"'\\\n]+)\1""")
+
+def source_files():
+    """
+    Pages and their row chunk files, plus the EXTRA files, relative to the
+    site root.
+    """
+    pages = sorted({p for pattern in PAGES for p in glob(pattern)})
+    rows = sorted(
+        os.path.join(d, n) for d in map(rows_dir, pages) if os.path.isdir(d)
+        for n in os.listdir(d) if n.endswith(".json")
+    )
+    extra = sorted({p for pattern in EXTRA for p in glob(pattern)})
+    return pages, rows, extra
+
+def hashed_name(path):
+    """
+    logo/vvd-80.webp -> logo/vvd-80.<first 10 hex of its sha256>.webp
+    """
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    base, ext = os.path.splitext(path)
+    return f"{base}.{h.hexdigest()[:10]}{ext}"
+
+def rewrite_refs(page, text, assets):
+    """
+    Point every local asset reference of page at its hashed name, adding
+    newly seen assets to assets ({source path: hashed path}).
+    """
+    folder = os.path.dirname(page)
+
+    def asset(ref):
+        if re.match(r"[a-z][a-z0-9+.-]*:|/|#", ref, re.IGNORECASE) or not ref.lower().endswith(HASH_EXTS):
+            return ref
+        path = os.path.normpath(os.path.join(folder, ref))
+        if path not in assets:
+            if not os.path.isfile(path):
+                return ref
+            assets[path] = hashed_name(path)
+        return f"{os.path.dirname(ref) + '/' if '/' in ref else ''}{os.path.basename(assets[path])}"
+
+    def css(code):
+        return _CSS_URL.sub(lambda m: m.group(1) + m.group(2) + asset(m.group(3)) + m.group(2) + m.group(4), code)
+
+    def attr(m):
+        name, value = m.group(1).lower(), m.group(4)
+        if name == "style":
+            value = css(value)
+        elif name == "srcset":
+            value = ", ".join(" ".join([asset(c.split()[0]), *c.split()[1:]]) if c.split() else c
+                              for c in value.split(","))
+        else:
+            value = asset(value.strip())
+        return m.group(1) + m.group(2) + m.group(3) + value + m.group(3)
+
+    def tags(html):
+        return _TAG.sub(lambda m: _URL_ATTR.sub(attr, m.group(0)), html)
+
+    out, pos = [], 0
+    for m in _SCRIPT_STYLE.finditer(text):
+        out.append(tags(text[pos:m.start()]))
+        body = m.group(3)
+        if m.group(2).lower() == "style":
+            body = css(body)
+        else:
+            body = _JS_STRING.sub(lambda s: s.group(1) + asset(s.group(2)) + s.group(1), body)
+        out.append(tags(m.group(1)) + body + m.group(4))
+        pos = m.end()
+    out.append(tags(text[pos:]))
+    return "".join(out)
+
+def optimize_png(src, dst):
+    """
+    Copy a PNG, re-encoded losslessly with the strongest zlib settings when
+    that is smaller.
+    """
+    with Image.open(src) as img:
+        img.save(dst + ".tmp", "PNG", optimize=True)
+    if os.path.getsize(dst + ".tmp") < os.path.getsize(src):
+        os.replace(dst + ".tmp", dst)
+    else:
+        os.remove(dst + ".tmp")
+        shutil.copyfile(src, dst)
+
+def compress_file(path):
+    """
+    Write path.gz and, with the brotli module, path.br, each only when
+    smaller than the file itself. Returns (path, size, gz_size, br_size),
+    None for a sibling not written.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    sizes = []
+    for ext, pack in ((".gz", lambda d: gzip.compress(d, 9, mtime=0)),
+                      (".br", brotli.compress if brotli else None)):
+        packed = pack(data) if pack else None
+        if packed is None or len(packed) >= len(data):
+            sizes.append(None)
+            continue
+        with open(path + ext, "wb") as f:
+            f.write(packed)
+        sizes.append(len(packed))
+    return (path, len(data), *sizes)
+
+def publish(out_dir=OUT_DIR, jobs=1):
+    """
+    Copy the site into a fresh out_dir: assets referenced from the pages
+    under content-hashed names (the pages rewritten to match, so assets can
+    be cached forever), PNGs recompressed, and a .gz/.br sibling next to
+    every text file. Returns (rows, failed) where rows are
+    (path, original size, published size, gz size, br size) per file.
+    """
+    pages, chunk_files, extra = source_files()
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+    def target(path):
+        dst = os.path.join(out_dir, path)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        return dst
+
+    assets = {}
+    for page in pages:
+        with open(page, "r", encoding="utf-8") as f:
+            text = f.read()
+        with open(target(page), "w", encoding="utf-8", newline="") as f:
+            f.write(rewrite_refs(page, text, assets))
+    for path in chunk_files:
+        shutil.copyfile(path, target(path))
+    for src, dst in assets.items():
+        if src.lower().endswith(".png"):
+            optimize_png(src, target(dst))
+        else:
+            shutil.copyfile(src, target(dst))
+    # EXTRA files stay at their own URL too, even when a page links them
+    # by their hashed name
+    for path in extra:
+        if path.lower().endswith(".png"):
+            optimize_png(path, target(path))
+        else:
+            shutil.copyfile(path, target(path))
+    with open(target(MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({src.replace(os.sep, "/"): dst.replace(os.sep, "/") for src, dst in sorted(assets.items())},
+                  f, ensure_ascii=False, separators=(",", ":"))
+
+    published = [*((p, p) for p in pages + chunk_files), *assets.items(), *((p, p) for p in extra)]
+    tasks = [os.path.join(out_dir, dst) for _, dst in published
+             if dst.lower().endswith(COMPRESS_EXTS) and os.path.getsize(os.path.join(out_dir, dst)) >= MIN_SIZE]
+
+    packed, failed = {}, 0
+    for (path,), result, error in run_tasks(compress_file, [(t,) for t in tasks], jobs):
+        if error:
+            failed += 1
+            print(f"Error compressing {path}: {error}")
+            continue
+        packed[path] = result[2:]
+
+    rows = []
+    for src, dst in published:
+        out = os.path.join(out_dir, dst)
+        gz, br = packed.get(out, (None, None))
+        rows.append((dst, os.path.getsize(src), os.path.getsize(out), gz, br))
+    return rows, failed
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Copy the built site into a folder ready to publish: hashed asset names, "
+                    "precompressed .gz/.br siblings and a report of the bytes saved per file.")
+    parser.add_argument("--out", default=OUT_DIR, help=f"output folder, replaced on every run (default: {OUT_DIR})")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="worker processes for compressing (default 0 = one per CPU core)")
+    parser.add_argument("--all", action="store_true", help="list every file, not only the ones that got smaller")
+    args = parser.parse_args()
+    jobs = resolve_jobs(args.jobs)
+
+    if brotli is None:
+        print("Note: the brotli module is not installed, only .gz siblings are written.")
+    rows, failed = publish(args.out, jobs)
+
+    def best(row):
+        return min(s for s in row[2:] if s is not None)
+
+    if not rows:
+        print(f"Nothing to publish to {args.out}.")
+        return
+    width = max(len(r[0]) for r in rows)
+    print(f"{'file':<{width}}{'original':>11}{'published':>11}{'gzip':>11}{'brotli':>11}{'saved':>11}")
+    for row in sorted(rows, key=lambda r: r[1] - best(r), reverse=True):
+        path, size, out, gz, br = row
+        if not args.all and best(row) >= size:
+            continue
+        print(f"{path:<{width}}{format_size(size):>11}{format_size(out):>11}"
+              f"{format_size(gz) if gz else '-':>11}{format_size(br) if br else '-':>11}"
+              f"{100 * (size - best(row)) / size if size else 0:>10.1f}%")
+    total = sum(r[1] for r in rows)
+    saved = sum(r[1] - best(r) for r in rows)
+    print(f"\nPublished {len(rows)} files to {args.out}: {format_size(total)} -> {format_size(total - saved)} "
+          f"transferred with the smallest encoding, {format_size(saved)} saved. {failed} failed.")
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,259 @@
-from PIL import Image
+#!/usr/bin/env python3
 import os
-import glob
+import re
+import json
+import shutil
+import argparse
+from html import escape
+from PIL import Image, features
+from viewcache import ViewCache
+from workers import resolve_jobs, run_tasks
 
 # Define the target size
 TARGET_SIZE = (500, 500)
+SOURCES = ["logo", "logos_extended"]
+OUT_DIR = "resized"
+MANIFEST_NAME = ".resizecache"
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
 
-# Get all jpg files in the current directory
-jpg_files = glob.glob('*.jpg') + glob.glob('*.JPG')
-
-# Process each image
-for filename in jpg_files:
-    try:
-        # Open the image
-        img = Image.open(filename)
-        
-        # Resize the image
-        img_resized = img.resize(TARGET_SIZE)
-        
-        # Save the resized image (overwrites original)
-        img_resized.save(filename)
-        
-        print(f"Resized: {filename}")
-        
-    except Exception as e:
-        print(f"Error processing {filename}: {e}")
-
-print(f"Completed! Processed {len(jpg_files)} images.")
+# Logos are shown at 80px (60px on phones); these cover 1x to 3x screens
+VARIANT_WIDTHS = (80, 160, 240)
+# Best first: the order of the <source> elements. AVIF needs a Pillow built
+# with libavif and is left out otherwise.
+VARIANT_FORMATS = {
+    "avif": ("AVIF", {"quality": 55}),
+    "webp": ("WEBP", {"quality": 80, "method": 6}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+VARIANTS_MANIFEST = "logos.json"
+LOGO_SIZES = "(max-width: 768px) 60px, 80px"
+
+def list_images(sources):
+    """
+    Every image under the source folders, walked recursively so
+    logos_extended/<party>/ is included, in a stable order.
+    """
+    paths = []
+    for src in sources:
+        for root, dirs, files in os.walk(src):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTS):
+                    paths.append(os.path.join(root, name))
+    return paths
+
+def resize_image(src, dst, size=TARGET_SIZE):
+    """
+    Write src scaled down to fit within size to dst, keeping the aspect
+    ratio. JPEGs are decoded at a reduced scale with draft() first, so a
+    1080px logo never gets decoded at full size. Images that already fit
+    are copied byte for byte instead of being re-encoded.
+    Returns the output size as [width, height].
+    """
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    tmp = dst + ".tmp"
+    with Image.open(src) as img:
+        if img.width <= size[0] and img.height <= size[1]:
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+            return [img.width, img.height]
+        fmt = img.format
+        img.draft("RGB", size)
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        if fmt == "JPEG":
+            img.save(tmp, "JPEG", quality=85, optimize=True, progressive=True)
+        else:
+            img.save(tmp, fmt, optimize=True)
+        os.replace(tmp, dst)
+        return [img.width, img.height]
+
+def available_formats():
+    return [ext for ext in VARIANT_FORMATS if ext != "avif" or features.check("avif")]
+
+def make_variants(src, out_base, widths=VARIANT_WIDTHS, formats=None):
+    """
+    Write out_base-<width>.<ext> for every width not larger than the source
+    and every format, decoding src once at the largest needed scale. Returns
+    the manifest entry: the source size and, per format, [path, width]
+    pairs from small to large.
+    """
+    formats = formats or available_formats()
+    os.makedirs(os.path.dirname(out_base) or ".", exist_ok=True)
+    with Image.open(src) as img:
+        full = [img.width, img.height]
+        # Always at least one variant, even for logos smaller than every width
+        wanted = [w for w in widths if w <= img.width] or [img.width]
+        img.draft("RGB", (wanted[-1], wanted[-1] * img.height // img.width))
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        entry = {"width": full[0], "height": full[1], "variants": {ext: [] for ext in formats}}
+        for w in reversed(wanted):
+            h = max(1, round(img.height * w / img.width))
+            img = img.resize((w, h), Image.Resampling.LANCZOS)
+            for ext in formats:
+                fmt, options = VARIANT_FORMATS[ext]
+                out = img.convert("RGB") if fmt == "JPEG" and img.mode != "RGB" else img
+                path = f"{out_base}-{w}.{ext}"
+                out.save(path + ".tmp", fmt, **options)
+                os.replace(path + ".tmp", path)
+                entry["variants"][ext].insert(0, [path.replace(os.sep, "/"), w])
+        return entry
+
+def build_variants(sources=SOURCES, out_dir=OUT_DIR, widths=VARIANT_WIDTHS, jobs=1, cache=None, force=False):
+    """
+    Multi-width, multi-format copies of every image under sources, plus
+    out_dir/logos.json mapping each source path to its variants for
+    srcset. Unchanged images whose variants all still exist are taken
+    from the cache. Returns (manifest, built, failed).
+    """
+    formats = available_formats()
+    kind = f"variants{'-'.join(map(str, widths))}.{'-'.join(formats)}"
+    manifest, tasks = {}, []
+    for src in list_images(sources):
+        rel = os.path.relpath(src)
+        hit = None if force or cache is None else cache.lookup(src, kind)
+        if hit and all(os.path.exists(p) for pairs in hit["variants"].values() for p, _ in pairs):
+            manifest[rel.replace(os.sep, "/")] = hit
+            continue
+        tasks.append((src, os.path.join(out_dir, os.path.splitext(rel)[0]), widths, formats))
+
+    built = failed = 0
+    for (src, _, _, _), result, error in run_tasks(make_variants, tasks, jobs):
+        if error:
+            failed += 1
+            print(f"Error processing {src}: {error}")
+            continue
+        built += 1
+        if cache is not None:
+            cache.store(src, kind, result)
+        manifest[os.path.relpath(src).replace(os.sep, "/")] = result
+        print(f"Variants: {src} -> {len(result['variants'])} formats x {len(next(iter(result['variants'].values())))} widths")
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, VARIANTS_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, ensure_ascii=False, separators=(",", ":"))
+    return manifest, built, failed
+
+def picture_html(src, entry, alt, sizes=LOGO_SIZES, prefix=""):
+    """
+    <picture> markup for a logo from its logos.json entry: one <source> per
+    modern format, and the JPEG variants on the <img> as the fallback.
+    prefix is prepended to every path, e.g. "../" for pages in a subfolder.
+    """
+    def srcset(pairs):
+        return escape(", ".join(f"{prefix}{path} {w}w" for path, w in pairs))
+
+    variants = entry["variants"]
+    fallback = variants.get("jpg") or next(iter(variants.values()))
+    width = fallback[0][1]
+    height = max(1, round(entry["height"] * width / entry["width"]))
+    sources = "".join(
+        f'<source type="image/{ext}" srcset="{srcset(pairs)}" sizes="{sizes}">'
+        for ext, pairs in variants.items() if ext != "jpg"
+    )
+    return (
+        f'<picture data-logo="{escape(src)}">{sources}'
+        f'<img src="{escape(prefix + fallback[0][0])}" srcset="{srcset(fallback)}" sizes="{sizes}" '
+        f'width="{width}" height="{height}" alt="{escape(alt)}" decoding="async"></picture>'
+    )
+
+# A plain <img src="logo/x.jpg" alt="..."> or a <picture data-logo=...>
+# written by an earlier run, so rewriting a page is repeatable
+_LOGO_TAG = re.compile(
+    r'<picture data-logo="(?P<pic>[^"]+)">.*?alt="(?P<pic_alt>[^"]*)"[^>]*></picture>'
+    r'|<img src="(?P<img>[^"]+)" alt="(?P<img_alt>[^"]*)">'
+)
+
+def rewrite_html(path, manifest, sizes=LOGO_SIZES):
+    """
+    Replace the logo <img> tags in a hand-written page such as index.html
+    with <picture> markup from the manifest. Images not in the manifest are
+    left alone. Returns the number of tags rewritten.
+    """
+    prefix = os.path.relpath(".", os.path.dirname(os.path.abspath(path)))
+    prefix = "" if prefix == "." else prefix.replace(os.sep, "/") + "/"
+    count = 0
+
+    def sub(m):
+        nonlocal count
+        src = m.group("pic") or m.group("img")
+        alt = m.group("pic_alt") if m.group("pic") else m.group("img_alt")
+        entry = manifest.get(src[len(prefix):] if src.startswith(prefix) else src)
+        if entry is None:
+            return m.group(0)
+        count += 1
+        return picture_html(src, entry, alt.replace("&amp;", "&").replace("&quot;", '"'), sizes, prefix)
+
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    new = _LOGO_TAG.sub(sub, text)
+    if new != text:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(new)
+    return count
+
+def resize_all(sources=SOURCES, out_dir=OUT_DIR, size=TARGET_SIZE, jobs=1, cache=None, force=False):
+    """
+    Resize every image under sources into out_dir, mirroring the folder
+    layout. With a ViewCache, images whose content and target size are
+    unchanged and whose output still exists are skipped, unless force is
+    set. Results are reported as they stream in from the pool.
+    Returns (resized, skipped, failed).
+    """
+    kind = f"resize{size[0]}x{size[1]}"
+    tasks = []
+    skipped = 0
+    for src in list_images(sources):
+        dst = os.path.join(out_dir, os.path.relpath(src))
+        if not force and cache is not None and cache.lookup(src, kind) is not None and os.path.exists(dst):
+            skipped += 1
+            continue
+        tasks.append((src, dst, size))
+
+    resized = failed = 0
+    for (src, dst, _), result, error in run_tasks(resize_image, tasks, jobs):
+        if error:
+            failed += 1
+            print(f"Error processing {src}: {error}")
+            continue
+        resized += 1
+        if cache is not None:
+            cache.store(src, kind, result)
+        print(f"Resized: {src} -> {dst} ({result[0]}x{result[1]})")
+    return resized, skipped, failed
+
+def main():
+    parser = argparse.ArgumentParser(description="Resize the party and account logos into an output folder.")
+    parser.add_argument("sources", nargs="*", default=SOURCES,
+                        help=f"folders to walk for images (default: {' '.join(SOURCES)})")
+    parser.add_argument("--out", default=OUT_DIR, help=f"output folder, mirroring the sources (default: {OUT_DIR})")
+    parser.add_argument("--size", type=int, nargs=2, default=TARGET_SIZE, metavar=("W", "H"),
+                        help=f"bounding box to scale down to (default: {TARGET_SIZE[0]} {TARGET_SIZE[1]})")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="worker processes (default 0 = one per CPU core)")
+    parser.add_argument("--force", action="store_true", help="resize every image, even unchanged ones")
+    parser.add_argument("--variants", action="store_true",
+                        help=f"instead of one resized copy, write {'/'.join(map(str, VARIANT_WIDTHS))}px "
+                             f"{'/'.join(VARIANT_FORMATS)} variants and OUT/{VARIANTS_MANIFEST} for srcset")
+    parser.add_argument("--rewrite-html", nargs="+", metavar="PAGE", default=[],
+                        help="with --variants, turn the logo <img> tags of these pages into <picture> markup")
+    args = parser.parse_args()
+    jobs = resolve_jobs(args.jobs)
+
+    cache = ViewCache(os.path.join(args.out, MANIFEST_NAME))
+    if args.variants:
+        if "avif" not in available_formats():
+            print("Note: this Pillow cannot write AVIF, only WebP and JPEG variants are made.")
+        manifest, built, failed = build_variants(args.sources, args.out, VARIANT_WIDTHS, jobs, cache, args.force)
+        cache.save()
+        for page in args.rewrite_html:
+            print(f"Rewrote {rewrite_html(page, manifest)} logos in {page}")
+        print(f"Completed! Built variants for {built}, {len(manifest) - built} unchanged, {failed} failed.")
+        return
+
+    resized, skipped, failed = resize_all(args.sources, args.out, tuple(args.size), jobs, cache, args.force)
+    os.makedirs(args.out, exist_ok=True)
+    cache.save()
+    print(f"Completed! Resized {resized}, skipped {skipped} unchanged, {failed} failed.")
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,19 @@
 #!/usr/bin/env python3
 import sys
-import json
 import os
 import html
+import shutil
+import argparse
+import tempfile
+from counts import parse_counts
+from htmlstream import pager_html, rows_dir, write_paged_rows
+from totalviews import CHUNK_SIZE, iter_json_array
+from workers import resolve_jobs, run_tasks
 
-def to_int(val):
-    if val is None:
-        return 0
-    if isinstance(val, (int, float)):
-        return int(val)
-    s = str(val).strip()
-    # Remove commas and spaces (e.g., "32,439")
-    s = s.replace(",", "").replace(" ", "")
-    if s == "" or s.lower() == "n/a":
-        return 0
-    try:
-        return int(float(s))
-    except ValueError:
-        return 0
+STAT_KEYS = ("followers", "following", "hearts", "videos", "friends")
+# Table columns in order, and how the pager renders each
+ROW_KEYS = ("username", "nickname") + STAT_KEYS
+ROW_COLUMNS = ("text", "text") + ("num",) * len(STAT_KEYS)
 
 def get(d, *keys, default=None):
     cur = d
@@ -27,9 +23,12 @@ def get(d, *keys, default=None):
         cur = cur[k]
     return cur
 
-def generate_html(title, rows, totals):
+SUBTITLE = "Combined totals are computed from the stats fields of each entry in this JSON."
+
+def page_head(title, totals, subtitle=SUBTITLE, first_columns=("Username", "Nickname")):
     # Minimal, clean HTML
-    head = f"""<!DOCTYPE html>
+    first_headers = "".join(f"        <th>{html.escape(c)}</th>\n" for c in first_columns)
+    return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="utf-8">
@@ -120,7 +119,7 @@ def generate_html(title, rows, totals):
 <body>
 <div class="container">
   <h1 class="title">{html.escape(title)}</h1>
-  <p class="subtitle">Combined totals are computed from the stats fields of each entry in this JSON.</p>
+  <p class="subtitle">{html.escape(subtitle)}</p>
 
   <div class="cards">
     <div class="card">
@@ -148,9 +147,7 @@ def generate_html(title, rows, totals):
   <table>
     <thead>
       <tr>
-        <th>Username</th>
-        <th>Nickname</th>
-        <th>Followers</th>
+{first_headers}        <th>Followers</th>
         <th>Following</th>
         <th>Hearts</th>
         <th>Videos</th>
@@ -159,81 +156,223 @@ def generate_html(title, rows, totals):
     </thead>
     <tbody>
 """
-    body_rows = []
-    for r in rows:
-        body_rows.append(
-            f"<tr>"
-            f"<td>{html.escape(r['username'])}</td>"
-            f"<td>{html.escape(r['nickname'])}</td>"
-            f"<td>{r['followers']:,}</td>"
-            f"<td>{r['following']:,}</td>"
-            f"<td>{r['hearts']:,}</td>"
-            f"<td>{r['videos']:,}</td>"
-            f"<td>{r['friends']:,}</td>"
-            f"</tr>"
-        )
-
-    foot = f"""    </tbody>
+
+def row_html(r):
+    return (
+        f"<tr>"
+        f"<td>{html.escape(r['username'])}</td>"
+        f"<td>{html.escape(r['nickname'])}</td>"
+        f"<td>{r['followers']:,}</td>"
+        f"<td>{r['following']:,}</td>"
+        f"<td>{r['hearts']:,}</td>"
+        f"<td>{r['videos']:,}</td>"
+        f"<td>{r['friends']:,}</td>"
+        f"</tr>"
+    )
+
+def row_cells(r):
+    return [r[k] for k in ROW_KEYS]
+
+TABLE_END = """    </tbody>
   </table>
+"""
 
+NOTE_FOOT = """
   <p class="note">Notes: Missing or non-numeric values are treated as 0. Numbers in the source like "32,439" are parsed correctly.</p>
 </div>
 </body>
 </html>"""
-    return head + "\n".join(body_rows) + "\n" + foot
+
+def write_foot(f, chunk_dir, pages, count):
+    f.write("\n" + TABLE_END)
+    f.write(pager_html(chunk_dir, pages, count, ROW_COLUMNS))
+    f.write(NOTE_FOOT)
+
+# The failure report tikip-multi.py writes next to the profile files
+REPORT_SUFFIX = ".failed.json"
+
+def is_profiles_file(path):
+    """
+    Whether path looks like a profile list: a .json file other than a
+    failure report whose JSON is an array.
+    """
+    name = os.path.basename(path).lower()
+    if not name.endswith(".json") or name.endswith(REPORT_SUFFIX):
+        return False
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read(CHUNK_SIZE).lstrip(" \t\n\r")[:1] == "["
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def iter_profiles(path):
+    """
+    Stream the profile objects of a JSON list file one at a time.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if f.read(CHUNK_SIZE).lstrip(" \t\n\r")[:1] != "[":
+            raise ValueError("Expected the JSON to be a list of profile objects")
+        f.seek(0)
+        yield from iter_json_array(f)
+
+def profile_row(item, bad):
+    """
+    One table row from a scraped profile. Scraped stats look like "32,439"
+    or "1.4M"; unparseable ones count as 0 and are appended to bad.
+    """
+    username = get(item, "profile_header", "username", default="") or get(item, "input_username", default="")
+    nickname = get(item, "profile_header", "nickname", default="")
+
+    stats = item.get("stats", {}) if isinstance(item, dict) else {}
+    followers, following, hearts, videos, friends = parse_counts(
+        (stats.get(k) for k in STAT_KEYS), errors=bad)
+
+    return {
+        "username": username or "",
+        "nickname": nickname or "",
+        "followers": followers,
+        "following": following,
+        "hearts": hearts,
+        "videos": videos,
+        "friends": friends,
+    }
+
+def build_page(in_path, out_path=None):
+    """
+    Render one stats JSON file to out_path, by default <base>.html next to
+    it. Returns the summary the cross-party overview needs: {"name",
+    "out_path", "profiles", "totals", "bad", "bad_count"}, where bad holds
+    the first few stat values that could not be parsed.
+    """
+    base, ext = os.path.splitext(in_path)
+    out_path = out_path or base + ".html"
+
+    # The header shows the totals, so the rows are rendered to a temporary
+    # file while summing and copied in after it: one parse, and memory stays
+    # flat however many profiles there are
+    totals = dict.fromkeys(STAT_KEYS, 0)
+    bad = []
+
+    def counted():
+        for item in iter_profiles(in_path):
+            row = profile_row(item, bad)
+            for k in STAT_KEYS:
+                totals[k] += row[k]
+            yield row
+
+    title = f"Combined statistics for {os.path.basename(in_path)}"
+    chunk_dir = rows_dir(out_path)
+    with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as body:
+        pages, count = write_paged_rows(body, counted(), row_html, row_cells, chunk_dir, "\n")
+        body.seek(0)
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(page_head(title, totals))
+            shutil.copyfileobj(body, f, CHUNK_SIZE)
+            write_foot(f, chunk_dir, pages, count)
+
+    return {"name": os.path.basename(base), "out_path": out_path, "profiles": count,
+            "totals": totals, "bad": bad[:5], "bad_count": len(bad)}
+
+def summarize_input(in_path, out_path=None):
+    """
+    The summary build_page returns, without rendering the page.
+    """
+    base, ext = os.path.splitext(in_path)
+    totals = dict.fromkeys(STAT_KEYS, 0)
+    bad = []
+    count = 0
+    for item in iter_profiles(in_path):
+        row = profile_row(item, bad)
+        count += 1
+        for k in STAT_KEYS:
+            totals[k] += row[k]
+    return {"name": os.path.basename(base), "out_path": out_path or base + ".html", "profiles": count,
+            "totals": totals, "bad": bad[:5], "bad_count": len(bad)}
+
+def list_inputs(inputs):
+    """
+    Expand the command line: files as given, directories to the profile
+    lists among their *.json (failure reports and other JSON are skipped).
+    """
+    paths = []
+    for p in inputs:
+        if os.path.isdir(p):
+            paths.extend(sorted(filter(is_profiles_file, (os.path.join(p, n) for n in os.listdir(p)))))
+        else:
+            paths.append(p)
+    return list(dict.fromkeys(paths))
+
+def summary_row(page):
+    t = page["totals"]
+    return (
+        f"<tr>"
+        f"<td><a href=\"{html.escape(os.path.basename(page['out_path']))}\">{html.escape(page['name'])}</a></td>"
+        f"<td>{page['profiles']:,}</td>"
+        + "".join(f"<td>{t[k]:,}</td>" for k in STAT_KEYS)
+        + "</tr>"
+    )
+
+def write_summary(path, pages):
+    """
+    Cross-party overview: one row per page, ranked by followers, with the
+    grand totals in the cards.
+    """
+    grand = {k: sum(p["totals"][k] for p in pages) for k in STAT_KEYS}
+    ranked = sorted(pages, key=lambda p: p["totals"]["followers"], reverse=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(page_head("Combined statistics for all parties", grand,
+                          f"Totals per party, computed from {len(pages)} stats files.", ("Party", "Profiles")))
+        f.write("\n".join(map(summary_row, ranked)))
+        f.write("\n" + TABLE_END + NOTE_FOOT)
 
 def main():
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(
+        description="Render stats HTML pages from scraped profile JSON files.",
+        epilog="With several inputs or a directory every page is rendered in one run, plus a cross-party overview.")
+    parser.add_argument("inputs", nargs="*", help="stats JSON files, or directories of them")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="worker processes for batch runs (default 0 = one per CPU core)")
+    parser.add_argument("--summary", metavar="PATH",
+                        help="where to write the cross-party overview (default: overview.html next to the first "
+                             "input, for batch runs only)")
+    args = parser.parse_args()
+    if not args.inputs:
         print("Drag a JSON file onto this script, or run: python generate_stats_html.py yourfile.json")
         sys.exit(1)
 
-    in_path = sys.argv[1]
-    base, ext = os.path.splitext(in_path)
-    out_path = base + ".html"
-
-    with open(in_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    if not isinstance(data, list):
-        raise ValueError("Expected the JSON to be a list of profile objects")
-
-    rows = []
-    totals = {"followers": 0, "following": 0, "hearts": 0, "videos": 0, "friends": 0}
-
-    for item in data:
-        username = get(item, "profile_header", "username", default="") or get(item, "input_username", default="")
-        nickname = get(item, "profile_header", "nickname", default="")
-
-        stats = item.get("stats", {}) if isinstance(item, dict) else {}
-        followers = to_int(stats.get("followers"))
-        following = to_int(stats.get("following"))
-        hearts    = to_int(stats.get("hearts"))
-        videos    = to_int(stats.get("videos"))
-        friends   = to_int(stats.get("friends"))
-
-        rows.append({
-            "username": username or "",
-            "nickname": nickname or "",
-            "followers": followers,
-            "following": following,
-            "hearts": hearts,
-            "videos": videos,
-            "friends": friends,
-        })
-
-        totals["followers"] += followers
-        totals["following"] += following
-        totals["hearts"]    += hearts
-        totals["videos"]    += videos
-        totals["friends"]   += friends
+    paths = list_inputs(args.inputs)
+    batch = len(paths) > 1 or any(os.path.isdir(p) for p in args.inputs)
+    jobs = resolve_jobs(args.jobs)
 
-    title = f"Combined statistics for {os.path.basename(in_path)}"
-    html_doc = generate_html(title, rows, totals)
+    pages = []
+    failed = 0
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(html_doc)
+    def report(results):
+        nonlocal failed
+        for (in_path,), page, error in results:
+            if error:
+                failed += 1
+                print(f"Error processing {in_path}: {error}", file=sys.stderr)
+                continue
+            pages.append(page)
+            print(f"Wrote {page['out_path']}")
+            if page["bad_count"]:
+                print(f"Warning: {page['bad_count']} stat values in {in_path} could not be parsed and were counted as 0: "
+                      f"{', '.join(map(repr, page['bad']))}{' ...' if page['bad_count'] > 5 else ''}", file=sys.stderr)
 
-    print(f"Wrote {out_path}")
+    if not batch:
+        # A single page keeps its old behaviour, errors included
+        report([((paths[0],), build_page(paths[0]), None)])
+        return
+
+    report(run_tasks(build_page, [(p,) for p in paths], jobs))
+
+    if pages:
+        summary = args.summary or os.path.join(os.path.dirname(pages[0]["out_path"]), "overview.html")
+        write_summary(summary, pages)
+        print(f"Wrote {summary} with {len(pages)} parties")
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
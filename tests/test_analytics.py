@@ -0,0 +1,40 @@
+import json
+
+import numpy as np
+
+import analytics
+from analytics import STORE_NAME, load_columns
+
+def make_root(tmp_path):
+    party = tmp_path / "vvd"
+    party.mkdir()
+    (party / "acc.json").write_text(json.dumps([{"url": "a", "views": "1.5K"}, {"url": "b", "views": 20}]),
+                                    encoding="utf-8")
+    return tmp_path
+
+def test_store_is_reused(tmp_path, monkeypatch):
+    root = make_root(tmp_path)
+    cols = load_columns(str(root))
+    assert cols["views"].tolist() == [1500, 20]
+    monkeypatch.setattr(analytics, "build_columns", lambda root: (_ for _ in ()).throw(AssertionError("rebuilt")))
+    again = load_columns(str(root))
+    assert sorted(again) == sorted(cols)
+    assert again["views"].tolist() == [1500, 20]
+
+def test_store_of_other_version_is_rebuilt(tmp_path, monkeypatch):
+    root = make_root(tmp_path)
+    store = root / STORE_NAME
+    # A store from before versioning, with stale values
+    np.savez_compressed(store, views=np.array([1], dtype=np.int64))
+    assert load_columns(str(root))["views"].tolist() == [1500, 20]
+    monkeypatch.setattr(analytics, "STORE_VERSION", analytics.STORE_VERSION + 1)
+    with np.load(store) as data:
+        assert int(data["version"]) == analytics.STORE_VERSION - 1
+    assert load_columns(str(root))["views"].tolist() == [1500, 20]
+    with np.load(store) as data:
+        assert int(data["version"]) == analytics.STORE_VERSION
+
+def test_unreadable_store_is_rebuilt(tmp_path):
+    root = make_root(tmp_path)
+    (root / STORE_NAME).write_bytes(b"not a zip")
+    assert load_columns(str(root))["views"].tolist() == [1500, 20]
@@ -0,0 +1,16 @@
+from tikip_common import ResultStore
+
+def test_stored_tracks_this_run_only(tmp_path):
+    path = tmp_path / "cache.jsonl"
+    with_old = ResultStore(path)
+    with_old.put("old", {"n": 1})
+    with_old.close()
+
+    store = ResultStore(path)
+    assert store.stored == set()
+    store.put("new", {"n": 2})
+    assert store.stored == {"new"}
+    # --ttl 0: the TTL drops both, so the output step must go by stored
+    assert store.get("new", ttl=0) is None and store.get("old", ttl=0) is None
+    assert store.get("new") == {"n": 2}
+    store.close()
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tikip_common import extract_profile
+from tikip_http import RateLimiter, fetch_profiles, profile_from_api
+from tikip_metrics import Metrics
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+
+def load(name):
+    with open(os.path.join(DATA, name), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class StubApi:
+    """
+    Local stand-in for the tikip.us API. responses maps a username to a
+    list of (status, body, headers) served in turn, the last one repeating;
+    unknown usernames get a 404. Every request is logged with its time.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                uname = self.path.rsplit("/", 1)[-1]
+                stub.requests.append((uname, time.monotonic()))
+                queue = stub.responses.get(uname, [(404, "", {})])
+                status, body, headers = queue.pop(0) if len(queue) > 1 else queue[0]
+                data = (body if isinstance(body, str) else json.dumps(body)).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/user/{{}}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def count(self, uname):
+        return sum(1 for u, _ in self.requests if u == uname)
+
+class FakeDriver:
+    """
+    Replays a recorded result of the page's extract script, so the
+    Selenium path's mapping runs without a browser.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def execute_script(self, script, *args):
+        return self.raw
+
+def fetch(api, usernames, **kwargs):
+    kwargs.setdefault("rate", 0)
+    kwargs.setdefault("backoff", 0.01)
+    kwargs.setdefault("timeout", 5)
+    return fetch_profiles(usernames, api_url=api.url, log=lambda msg: None, **kwargs)
+
+def test_api_mapping_matches_selenium_mapping():
+    # Both fixtures are hand-written to describe the same account, not
+    # recorded from the site: this checks that profile_from_api and
+    # extract_profile agree on the output schema, not that the API is real.
+    selenium_profile = extract_profile(FakeDriver(load("tikip_page_vvd.json")), "vvd")
+    with StubApi({"vvd": [(200, load("tikip_api_vvd.json"), {})]}) as api:
+        profiles, failed = fetch(api, ["vvd"])
+    assert failed == []
+    assert profiles == [selenium_profile]
+    assert json.dumps(profiles[0], ensure_ascii=False, indent=2) == json.dumps(selenium_profile, ensure_ascii=False, indent=2)
+
+def test_payload_without_userinfo_wrapper():
+    payload = load("tikip_api_vvd.json")["userInfo"]
+    assert profile_from_api("vvd", payload) == profile_from_api("vvd", load("tikip_api_vvd.json"))
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_throttling_and_server_errors(status):
+    payload = load("tikip_api_vvd.json")
+    with StubApi({"vvd": [(status, "", {}), (status, "", {"Retry-After": "0"}), (200, payload, {})]}) as api:
+        profiles, failed = fetch(api, ["vvd"], retries=2)
+    assert failed == []
+    assert len(profiles) == 1
+    assert api.count("vvd") == 3
+
+def test_gives_up_after_retries():
+    with StubApi({"vvd": [(503, "", {})]}) as api:
+        profiles, failed = fetch(api, ["vvd"], retries=2)
+    assert profiles == []
+    assert failed == ["vvd"]
+    assert api.count("vvd") == 3
+
+def test_other_errors_are_not_retried():
+    with StubApi({"vvd": [(403, "", {})]}) as api:
+        _, failed = fetch(api, ["vvd"], retries=2)
+    assert failed == ["vvd"]
+    assert api.count("vvd") == 1
+
+def test_failed_usernames_fall_back_in_order():
+    payload = load("tikip_api_vvd.json")
+    responses = {
+        "vvd": [(200, payload, {})],
+        "empty": [(200, {"userInfo": {}}, {})],
+        "broken": [(200, "{not json", {})],
+        "gone": [(404, "", {})],
+        "busy": [(429, "", {})],
+    }
+    stored = []
+    with StubApi(responses) as api:
+        profiles, failed = fetch(api, ["gone", "vvd", "empty", "broken", "busy"], retries=1,
+                                 on_profile=lambda u, p: stored.append(u))
+    assert [p["input_username"] for p in profiles] == ["vvd"]
+    assert stored == ["vvd"]
+    assert failed == ["gone", "empty", "broken", "busy"]
+
+def test_rate_limit_spaces_requests():
+    payload = load("tikip_api_vvd.json")
+    names = [f"u{i}" for i in range(6)]
+    with StubApi({u: [(200, payload, {})] for u in names}) as api:
+        profiles, failed = fetch(api, names, rate=20, concurrency=1)
+    assert len(profiles) == 6 and failed == []
+    times = sorted(t for _, t in api.requests)
+    # The burst is the concurrency, 1 here, so the six requests are at
+    # least 1/20 s apart
+    assert times[-1] - times[0] >= 5 / 20 * 0.9
+
+def test_rate_limiter_caps_rate():
+    async def run():
+        limiter = RateLimiter(20, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    # The first token is there at once, the next five take 1/20 s each
+    assert asyncio.run(run()) >= 5 / 20 * 0.9
+
+def test_rate_limit_across_retries():
+    payload = load("tikip_api_vvd.json")
+    with StubApi({"vvd": [(429, "", {"Retry-After": "0"}), (200, payload, {})]}) as api:
+        fetch(api, ["vvd"], rate=5, concurrency=1)
+    (_, first), (_, second) = api.requests
+    # Times are taken on the server, so the first request can arrive late
+    # by its connection setup; leave that some room under the 0.2 s gap
+    assert second - first >= 0.15
+
+def test_retry_after_is_capped():
+    payload = load("tikip_api_vvd.json")
+    with StubApi({"vvd": [(429, "", {"Retry-After": "3600"}), (200, payload, {})]}) as api:
+        start = time.monotonic()
+        profiles, failed = fetch(api, ["vvd"], backoff=0.01, max_backoff=0.05)
+    assert failed == [] and len(profiles) == 1
+    assert time.monotonic() - start < 5
+
+def test_fetches_are_recorded_in_metrics(tmp_path):
+    payload = load("tikip_api_vvd.json")
+    metrics = Metrics(tmp_path / "run.metrics.jsonl")
+    with StubApi({"vvd": [(200, payload, {})], "gone": [(404, "", {})]}) as api:
+        fetch(api, ["vvd", "gone"], metrics=metrics)
+    metrics.close()
+    records = {r["username"]: r for r in map(json.loads, (tmp_path / "run.metrics.jsonl").read_text().splitlines())}
+    assert records["vvd"]["status"] == "ok" and records["gone"]["status"] == "fallback"
+    assert "request" in records["vvd"] and "total" in records["vvd"]
+    summary = metrics.summary()
+    assert summary[0].startswith("Profiles: 1 ok, 0 failed, 1 sent to the browser in ")
+    assert any(line.startswith("request ") for line in summary)
@@ -0,0 +1,41 @@
+import time
+
+from tikip_scheduler import AdaptiveLimit, Scheduler
+
+def test_acquire_times_out():
+    limit = AdaptiveLimit(1)
+    assert limit.acquire(timeout=0.1)
+    start = time.monotonic()
+    assert not limit.acquire(timeout=0.1)
+    assert time.monotonic() - start >= 0.09
+    limit.release(healthy=None)
+    assert limit.acquire(timeout=0)
+
+def test_slot_wait_counts_against_deadline():
+    scheduler = Scheduler(2, attempts=1, task_timeout=1.0)
+    scheduler.limit.limit = 1
+    given = {}
+
+    def work(item, timeout):
+        given[item] = timeout
+        time.sleep(0.6 if item == "a" else 0.8)
+        return item
+
+    started = time.monotonic()
+    results, failed = scheduler.run(["a", "b"], work)
+    # "b" waits 0.6 s for the slot and is handed what is left of its 1 s
+    assert results == {"a": "a", "b": "b"}
+    assert given["b"] <= 0.45
+    assert time.monotonic() - started >= 1.3
+
+def test_slot_wait_past_deadline_fails():
+    scheduler = Scheduler(2, attempts=1, task_timeout=0.3)
+    scheduler.limit.limit = 1
+
+    def work(item, timeout):
+        time.sleep(0.6)
+        return item
+
+    results, failed = scheduler.run(["a", "b"], work)
+    assert results == {"a": "a"}
+    assert failed == {"b": {"attempts": 0, "errors": ["deadline exceeded"]}}
@@ -0,0 +1,41 @@
+import io
+import json
+
+import pytest
+
+import totalviews
+from totalviews import iter_json_array, sum_views_in_file
+
+DOCS = [
+    "[1.5, 2]",
+    "[1.5,2]",
+    "[-0.25e+3, 1E2, 12345.678, 0]",
+    '[{"url": "a", "views": "1.2K"}, {"url": "b", "views": 30.5}]',
+    '[true, false, null, "1.5", 7]',
+    " [ ] ",
+    '[[1, 2.5], {"a": [3e1]}]',
+]
+
+@pytest.mark.parametrize("doc", DOCS)
+def test_iter_json_array_any_chunk_size(monkeypatch, doc):
+    expected = json.loads(doc)
+    for size in range(1, len(doc) + 2):
+        monkeypatch.setattr(totalviews, "CHUNK_SIZE", size)
+        assert list(iter_json_array(io.StringIO(doc))) == expected, f"CHUNK_SIZE {size}"
+
+@pytest.mark.parametrize("doc", ["[1.5, 2", "[1.5 2]", "[1.5, 2] 3", "[1.]", "[1, ]"])
+def test_iter_json_array_rejects_malformed(monkeypatch, doc):
+    for size in range(1, len(doc) + 2):
+        monkeypatch.setattr(totalviews, "CHUNK_SIZE", size)
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(doc)))
+
+def test_sum_views_in_file_any_chunk_size(monkeypatch, tmp_path):
+    path = tmp_path / "views.json"
+    path.write_text('[{"url": "a", "views": 1.5}, {"url": "b", "views": 2}, {"url": "c", "views": "1K"}]',
+                    encoding="utf-8")
+    expected = sum_views_in_file(str(path))
+    assert expected[0] == 3
+    for size in range(1, 40):
+        monkeypatch.setattr(totalviews, "CHUNK_SIZE", size)
+        assert sum_views_in_file(str(path)) == expected
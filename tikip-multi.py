@@ -1,15 +1,56 @@
-from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import json, time, re, sys, threading
+import argparse, glob, json, sys, threading, time
+from tikip_common import DriverPool, ResultStore, clear_results, extract_profile, username_from_link, wait_for_profile
+from tikip_metrics import Metrics, ProfileTimer
+from tikip_scheduler import Scheduler
 
-inp_path = Path(sys.argv[1])
-out_path = inp_path.with_suffix(".json")
-log_path = inp_path.with_suffix(".log")
+parser = argparse.ArgumentParser(description="Scrape tikip.us profiles for every TikTok link in one or more text files.")
+parser.add_argument("inputs", nargs="+", metavar="input",
+                    help="text file with one TikTok profile link or username per line, "
+                         "a directory of such .txt files, or a glob like 'txt/*.txt'")
+parser.add_argument("--engine", choices=["selenium", "http"], default="selenium",
+                    help="selenium drives a browser; http (experimental, needs --api-url) calls a JSON API "
+                         "directly and falls back to the browser for profiles it cannot fetch")
+parser.add_argument("--api-url", default=None,
+                    help="API URL for --engine http, with {} for the username; required with --engine http")
+parser.add_argument("--rate", type=float, default=5.0, help="max API requests per second for --engine http")
+parser.add_argument("--cache", default=None,
+                    help="JSONL file every finished profile is appended to (default: tikip-cache.jsonl next to the input)")
+parser.add_argument("--resume", action="store_true", help="skip usernames with a fresh entry in the cache")
+parser.add_argument("--ttl", type=float, default=24.0, help="hours before a cached profile counts as stale")
+parser.add_argument("--attempts", type=int, default=3, help="tries per username before it is reported as failed")
+parser.add_argument("--task-timeout", type=float, default=120.0,
+                    help="seconds each username may take across all of its attempts")
+parser.add_argument("--metrics", default=None,
+                    help="JSONL file for per-profile phase timings (default: <log name>.metrics.jsonl)")
+args = parser.parse_args()
+if args.engine == "http" and not args.api_url:
+    parser.error("--engine http needs --api-url")
+
+def expand_inputs(specs):
+    paths = []
+    for spec in specs:
+        p = Path(spec)
+        if p.is_dir():
+            paths.extend(sorted(p.glob("*.txt")))
+        elif glob.has_magic(spec):
+            paths.extend(Path(m) for m in sorted(glob.glob(spec)))
+        else:
+            paths.append(p)
+    return list(dict.fromkeys(paths))
+
+inp_paths = expand_inputs(args.inputs)
+if not inp_paths:
+    parser.error("no input files found")
+# A single file keeps its own <name>.log; a batch logs next to the first file
+run_base = inp_paths[0].with_suffix("") if len(inp_paths) == 1 else inp_paths[0].parent / "batch"
+log_path = run_base.with_name(run_base.name + ".log")
+failed_path = run_base.with_name(run_base.name + ".failed.json")
+metrics_path = Path(args.metrics) if args.metrics else run_base.with_name(run_base.name + ".metrics.jsonl")
 
 # Thread-safe tee logger to console and file [web:92][web:131]
 log_lock = threading.Lock()
@@ -21,97 +62,139 @@ def log(msg="", end="\n"):
         log_file.write(msg + end)
         log_file.flush()
 
-log(f"Input: {inp_path}")
-log(f"Output: {out_path}")
+for p in inp_paths:
+    log(f"Input: {p} -> {p.with_suffix('.json')}")
 log(f"Log: {log_path}")
+log(f"Metrics: {metrics_path}")
+metrics = Metrics(metrics_path)
 
-def username_from_link(link):
-    m = re.search(r"tiktok\\.com/@([^/?#]+)", link.strip())
-    return m.group(1) if m else link.strip().lstrip("@")
-
-def normalize_bio_link(href):
-    if not href or href.strip() == "" or href.strip() == "https://tikip.us/#":
-        return "N/A"
-    return href
-
-def scrape_one(uname):
+def scrape_one(uname, timeout):
+    # One deadline for the whole attempt: every phase below, starting the
+    # browser included, only gets what is left of it
+    deadline = time.monotonic() + timeout
     tid = threading.current_thread().name
     log(f"[{tid}] Start @{uname}")  # per-task start line [web:130]
-    opts = Options()
-    opts.add_argument("--headless=new")
-    driver = webdriver.Chrome(options=opts)
-    wait = WebDriverWait(driver, 30)
-
-    driver.get("https://tikip.us/")
-    inp = wait.until(EC.presence_of_element_located((By.ID, "username-input")))
-    inp.clear()
-    inp.send_keys(uname)
-    driver.find_element(By.ID, "search-button").click()
-
-    WebDriverWait(driver, 30).until(EC.visibility_of_element_located((By.ID, "results-card")))
-    WebDriverWait(driver, 30).until(lambda d: d.find_element(By.ID, "nickname").text.strip() != "" or
-                                         d.find_element(By.ID, "username").text.strip() != "")
-    time.sleep(3)
-
-    def txt(eid): return driver.find_element(By.ID, eid).text.strip()
-    def attr(eid, name): return driver.find_element(By.ID, eid).get_attribute(name) or ""
-
-    profile_header = {
-        "nickname": txt("nickname"),
-        "username": txt("username"),
-        "profile_link": attr("profile-link", "href"),
-    }
-    avatar = {
-        "avatar_src": attr("avatar", "src"),
-        "download_avatar_link": attr("download-avatar-link", "href"),
-    }
-    raw_bio_link = attr("bio-link", "href")
-    bio = {
-        "about": txt("about"),
-        "bio_link": normalize_bio_link(raw_bio_link),
-    }
-    profile_details = {
-        "user_id": txt("user-id"),
-        "country": txt("country"),
-        "language": txt("language"),
-        "account_created": txt("created-date"),
-        "nickname_modified": txt("nickname-modified"),
-        "username_modified": txt("username-modified"),
-    }
-    stats = {
-        "followers": txt("followers"),
-        "following": txt("following"),
-        "hearts": txt("hearts"),
-        "videos": txt("videos"),
-        "friends": txt("friends"),
-    }
-
-    driver.quit()
+    timer = ProfileTimer(uname)
+    with timer.phase("acquire"):
+        driver = pool.acquire(timeout=timeout)
+    try:
+        profile = scrape_with(driver, uname, tid, deadline, timer)
+    except BaseException:
+        pool.release(driver, failed=True)
+        metrics.add(timer, status="error")
+        raise
+    pool.release(driver)
+    store.put(uname, profile)
+    metrics.add(timer)
+    return profile
+
+def time_left(deadline):
+    # Each wait gets at most result_timeout, and never more than the
+    # attempt has left
+    left = min(result_timeout, deadline - time.monotonic())
+    if left <= 0:
+        raise TimeoutException("deadline exceeded")
+    return left
+
+def scrape_with(driver, uname, tid, deadline, timer):
+    # Pooled drivers stay on the search page between tasks, so clear the
+    # previous result before searching or the wait below matches stale text.
+    with timer.phase("page_load"):
+        inp = WebDriverWait(driver, time_left(deadline)).until(
+            EC.presence_of_element_located((By.ID, "username-input")))
+    with timer.phase("search"):
+        clear_results(driver)
+        inp.clear()
+        inp.send_keys(uname)
+        driver.find_element(By.ID, "search-button").click()
+
+    with timer.phase("results_wait"):
+        timeout = time_left(deadline)
+        status = wait_for_profile(driver, timeout=timeout)
+    if status == "partial":
+        log(f"[{tid}] Some stats still empty after {timeout:.0f}s for @{uname}")
+
+    with timer.phase("extract"):
+        profile = extract_profile(driver, uname)
     log(f"[{tid}] Done @{uname}")  # per-task end line [web:130]
-    return {
-        "input_username": uname,
-        "profile_header": profile_header,
-        "avatar": avatar,
-        "bio": bio,
-        "profile_details": profile_details,
-        "stats": stats
-    }
-
-lines = [ln for ln in inp_path.read_text(encoding="utf-8").splitlines() if ln.strip()]
-usernames = [username_from_link(ln) for ln in lines]
-log(f"Found {len(usernames)} usernames")
-
-out = []
+    return profile
+
+per_file = {}
+for p in inp_paths:
+    lines = [ln for ln in p.read_text(encoding="utf-8").splitlines() if ln.strip()]
+    per_file[p] = [username_from_link(ln) for ln in lines]
+# Accounts listed in several party files are scraped once
+usernames = list(dict.fromkeys(u for names in per_file.values() for u in names))
+listed = sum(len(names) for names in per_file.values())
+log(f"Found {len(usernames)} usernames ({listed - len(usernames)} duplicates skipped)")
+
+store = ResultStore(args.cache or inp_paths[0].parent / "tikip-cache.jsonl")
+log(f"Cache: {store.path} ({len(store)} entries)")
+todo = usernames
+if args.resume:
+    todo = [u for u in usernames if store.get(u, ttl=args.ttl * 3600) is None]
+    log(f"Resuming: {len(usernames) - len(todo)} fresh in cache, {len(todo)} to scrape")
+
 max_workers = 10  # adjust to your machine
-with ThreadPoolExecutor(max_workers=max_workers) as ex:
-    futures = {ex.submit(scrape_one, u): u for u in usernames}
-    for fut in as_completed(futures):
-        out.append(fut.result())
+result_timeout = 30  # seconds to wait for a profile to finish loading
+# One long-lived browser per worker instead of one per username. Drivers
+# start lazily, so an http run that never falls back starts no browser.
+pool = DriverPool(max_workers, log=log)
+# Retries, per-username deadlines and adaptive concurrency; a username that
+# keeps failing ends up in the failed report instead of aborting the run.
+scheduler = Scheduler(max_workers, attempts=args.attempts, task_timeout=args.task_timeout, log=log)
+failures = {}
+
+def scrape_all(names):
+    _, failed = scheduler.run(names, scrape_one)
+    failures.update(failed)
 
-# Preserve input order
-order = {u: i for i, u in enumerate(usernames)}
-out.sort(key=lambda x: order.get(x["input_username"], 10**9))
+try:
+    if args.engine == "http":
+        from tikip_http import fetch_profiles
+        profiles, failed = fetch_profiles(todo, api_url=args.api_url,
+                                          concurrency=max_workers, rate=args.rate,
+                                          timeout=result_timeout, log=log, on_profile=store.put,
+                                          metrics=metrics)
+        log(f"Fetched {len(profiles)} profiles over HTTP")
+        if failed:
+            log(f"Falling back to the browser for {len(failed)} usernames")
+            scrape_all(failed)
+    else:
+        scrape_all(todo)
+finally:
+    log(f"Drivers started: {pool.created} (replaced {pool.replaced})")
+    pool.close()
+    store.close()
+    metrics.close()
+    for line in metrics.summary():
+        log(line)
 
-out_path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
-log(f"Wrote {out_path}")
+# Assemble each party's output from the cache in input order. Only
+# profiles scraped in this run or still within --ttl are used; a username
+# that failed now is left out rather than filled in from an old entry.
+# The TTL only applies to entries from before this run, so a long run or
+# --ttl 0 keeps what it scraped itself.
+ttl = args.ttl * 3600
+for p, names in per_file.items():
+    out = []
+    out_path = p.with_suffix(".json")
+    for u in names:
+        profile = store.get(u) if u in store.stored else store.get(u, ttl=ttl)
+        if profile is not None:
+            out.append(profile)
+            continue
+        scraped_at = store.scraped_at(u)
+        if scraped_at is None:
+            log(f"Left out @{u} from {out_path}: no profile scraped")
+        else:
+            log(f"Left out @{u} from {out_path}: cached profile is stale "
+                f"({(time.time() - scraped_at) / 3600:.1f}h old, --ttl {args.ttl:g}h)")
+    out_path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    log(f"Wrote {out_path}")
+if failures:
+    failed_path.write_text(json.dumps(failures, ensure_ascii=False, indent=2), encoding="utf-8")
+    log(f"{len(failures)} usernames failed, see {failed_path}")
+elif failed_path.exists():
+    failed_path.unlink()
 log_file.close()
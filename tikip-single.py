@@ -4,11 +4,14 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from pathlib import Path
-import json, time, re, sys, itertools
+import json, time, sys
+from tikip_common import clear_results, extract_profile, username_from_link, wait_for_profile
+from tikip_metrics import Metrics, ProfileTimer
 
 inp_path = Path(sys.argv[1])
 out_path = inp_path.with_suffix(".json")
 log_path = inp_path.with_suffix(".log")
+metrics_path = inp_path.with_suffix(".metrics.jsonl")
 
 log_file = open(log_path, "w", encoding="utf-8")
 def log(msg="", end="\n", flush=True):
@@ -20,47 +23,27 @@ def log(msg="", end="\n", flush=True):
 log(f"Input: {inp_path}")
 log(f"Output: {out_path}")
 log(f"Log: {log_path}")
+log(f"Metrics: {metrics_path}")
+metrics = Metrics(metrics_path)
 
+start = time.time()
 opts = Options()
 opts.add_argument("--headless=new")
 driver = webdriver.Chrome(options=opts)
 wait = WebDriverWait(driver, 30)
 
 driver.get("https://tikip.us/")
+log(f"Browser ready in {time.time() - start:.1f}s")
 
-def username_from_link(link):
-    m = re.search(r"tiktok\.com/@([^/?#]+)", link.strip())
-    return m.group(1) if m else link.strip().lstrip("@")
+result_timeout = 30  # seconds to wait for a profile to finish loading
 
-def wait_for_results_with_spinner():
-    spinner = itertools.cycle("|/-\\")
+def wait_for_results():
+    log("Waiting for results...")
     start = time.time()
-    while True:
-        try:
-            card = driver.find_element(By.ID, "results-card")
-            if card.is_displayed():
-                nick = driver.find_element(By.ID, "nickname").text.strip()
-                user = driver.find_element(By.ID, "username").text.strip()
-                if nick or user:
-                    sys.stdout.write("\rLoaded results...           \n")
-                    sys.stdout.flush()
-                    log("Loaded results...")
-                    return
-        except:
-            pass
-        elapsed = int(time.time() - start)
-        sys.stdout.write(f"\rWaiting for results {next(spinner)}  {elapsed}s")
-        sys.stdout.flush()
-        log(f"Waiting for results... {elapsed}s", end="\r")
-        time.sleep(0.1)
-
-def txt(eid): return driver.find_element(By.ID, eid).text.strip()
-def attr(eid, name): return driver.find_element(By.ID, eid).get_attribute(name) or ""
-
-def normalize_bio_link(href):
-    if not href or href.strip() == "" or href.strip() == "https://tikip.us/#":
-        return "N/A"
-    return href
+    status = wait_for_profile(driver, timeout=result_timeout)
+    if status == "partial":
+        log(f"Some stats still empty after {result_timeout}s")
+    log(f"Loaded results in {time.time() - start:.1f}s")
 
 lines = [ln for ln in inp_path.read_text(encoding="utf-8").splitlines() if ln.strip()]
 total = len(lines)
@@ -70,56 +53,28 @@ out = []
 for i, line in enumerate(lines, 1):
     uname = username_from_link(line)
     log(f"[{i}/{total}] Processing @{uname}")
+    timer = ProfileTimer(uname)
 
-    inp = wait.until(EC.presence_of_element_located((By.ID, "username-input")))
-    inp.clear()
-    inp.send_keys(uname)
-    driver.find_element(By.ID, "search-button").click()
+    with timer.phase("page_load"):
+        inp = wait.until(EC.presence_of_element_located((By.ID, "username-input")))
+    with timer.phase("search"):
+        clear_results(driver)
+        inp.clear()
+        inp.send_keys(uname)
+        driver.find_element(By.ID, "search-button").click()
 
-    wait_for_results_with_spinner()
-    log("Stabilizing 3s...")
-    time.sleep(3)  # shortened stabilization [web:98][web:101]
+    with timer.phase("results_wait"):
+        wait_for_results()
 
-    profile_header = {
-        "nickname": txt("nickname"),
-        "username": txt("username"),
-        "profile_link": attr("profile-link", "href"),
-    }
-    avatar = {
-        "avatar_src": attr("avatar", "src"),
-        "download_avatar_link": attr("download-avatar-link", "href"),
-    }
-    raw_bio_link = attr("bio-link", "href")
-    bio = {
-        "about": txt("about"),
-        "bio_link": normalize_bio_link(raw_bio_link),
-    }
-    profile_details = {
-        "user_id": txt("user-id"),
-        "country": txt("country"),
-        "language": txt("language"),
-        "account_created": txt("created-date"),
-        "nickname_modified": txt("nickname-modified"),
-        "username_modified": txt("username-modified"),
-    }
-    stats = {
-        "followers": txt("followers"),
-        "following": txt("following"),
-        "hearts": txt("hearts"),
-        "videos": txt("videos"),
-        "friends": txt("friends"),
-    }
-    out.append({
-        "input_username": uname,
-        "profile_header": profile_header,
-        "avatar": avatar,
-        "bio": bio,
-        "profile_details": profile_details,
-        "stats": stats
-    })
+    with timer.phase("extract"):
+        out.append(extract_profile(driver, uname))
+    metrics.add(timer)
     log(f"[{i}/{total}] Done")
 
 out_path.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
 log(f"Wrote {out_path}")
 driver.quit()
+metrics.close()
+for line in metrics.summary():
+    log(line)
 log_file.close()
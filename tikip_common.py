@@ -0,0 +1,366 @@
+from selenium import webdriver
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.chrome.options import Options
+from pathlib import Path
+import json, queue, re, threading, time
+
+SEARCH_URL = "https://tikip.us/"
+
+STAT_IDS = ["followers", "following", "hearts", "videos", "friends"]
+TEXT_IDS = ["nickname", "username", "about", "user-id", "country", "language",
+            "created-date", "nickname-modified", "username-modified"] + STAT_IDS
+
+# Resolves once the results card is visible, the header and every stat field
+# are filled in and none of them has changed for `quietMs`. A MutationObserver
+# re-arms the quiet timer on each DOM change, so no polling is involved.
+_WAIT_READY_JS = """
+const [statIds, quietMs, timeoutMs] = arguments;
+const done = arguments[arguments.length - 1];
+const text = id => { const el = document.getElementById(id); return el ? el.textContent.trim() : ''; };
+const visible = () => {
+  const card = document.getElementById('results-card');
+  return !!card && card.getClientRects().length > 0 && getComputedStyle(card).visibility !== 'hidden';
+};
+const header = () => visible() && (text('nickname') !== '' || text('username') !== '');
+const ready = () => header() && statIds.every(id => text(id) !== '');
+let quiet = null, finished = false;
+const finish = status => {
+  if (finished) return;
+  finished = true;
+  observer.disconnect();
+  clearTimeout(quiet);
+  clearTimeout(deadline);
+  done(status);
+};
+const check = () => {
+  clearTimeout(quiet);
+  if (ready()) quiet = setTimeout(() => { if (ready()) finish('ready'); }, quietMs);
+};
+const observer = new MutationObserver(check);
+observer.observe(document.documentElement, {
+  subtree: true, childList: true, characterData: true,
+  attributes: true, attributeFilter: ['style', 'class', 'hidden'],
+});
+const deadline = setTimeout(() => finish(header() ? 'partial' : 'timeout'), timeoutMs);
+check();
+"""
+
+ATTR_FIELDS = [("profile-link", "href"), ("avatar", "src"),
+               ("download-avatar-link", "href"), ("bio-link", "href")]
+
+# Reads every field in one round trip. innerText matches what WebElement.text
+# returns, and properties are preferred over attributes like get_attribute().
+_EXTRACT_JS = """
+const [textIds, attrFields] = arguments;
+const out = {text: {}, attr: {}, missing: []};
+for (const id of textIds) {
+  const el = document.getElementById(id);
+  if (!el) { out.missing.push(id); continue; }
+  out.text[id] = el.innerText || '';
+}
+for (const [id, name] of attrFields) {
+  const el = document.getElementById(id);
+  if (!el) { out.missing.push(id); continue; }
+  const prop = el[name];
+  const value = prop !== undefined && prop !== null ? prop : el.getAttribute(name);
+  out.attr[id] = value === null || value === undefined ? '' : String(value);
+}
+return out;
+"""
+
+def username_from_link(link):
+    m = re.search(r"tiktok\.com/@([^/?#]+)", link.strip())
+    return m.group(1) if m else link.strip().lstrip("@")
+
+def normalize_bio_link(href):
+    if not href or href.strip() == "" or href.strip() == "https://tikip.us/#":
+        return "N/A"
+    return href
+
+def extract_profile(driver, uname):
+    """
+    Read the whole result card with a single execute_script call and return
+    it in the scrapers' output schema.
+    """
+    raw = driver.execute_script(_EXTRACT_JS, TEXT_IDS, ATTR_FIELDS)
+    if raw["missing"]:
+        raise NoSuchElementException(f"Missing result fields: {', '.join(raw['missing'])}")
+    txt = {k: v.strip() for k, v in raw["text"].items()}
+    attr = raw["attr"]
+    return {
+        "input_username": uname,
+        "profile_header": {
+            "nickname": txt["nickname"],
+            "username": txt["username"],
+            "profile_link": attr["profile-link"],
+        },
+        "avatar": {
+            "avatar_src": attr["avatar"],
+            "download_avatar_link": attr["download-avatar-link"],
+        },
+        "bio": {
+            "about": txt["about"],
+            "bio_link": normalize_bio_link(attr["bio-link"]),
+        },
+        "profile_details": {
+            "user_id": txt["user-id"],
+            "country": txt["country"],
+            "language": txt["language"],
+            "account_created": txt["created-date"],
+            "nickname_modified": txt["nickname-modified"],
+            "username_modified": txt["username-modified"],
+        },
+        "stats": {k: txt[k] for k in STAT_IDS},
+    }
+
+def clear_results(driver):
+    """
+    Blank every result field so a reused page cannot report the previous
+    profile as the answer to the next search.
+    """
+    driver.execute_script(
+        "for (const id of arguments[0]) {"
+        "  const el = document.getElementById(id); if (el) el.textContent = '';"
+        "}", TEXT_IDS)
+
+def wait_for_profile(driver, timeout=30, quiet=0.3):
+    """
+    Block until the results card is filled in and has settled.
+
+    Returns "ready" when every stat field is present, or "partial" when the
+    timeout hit after the header loaded but some stats stayed empty. Raises
+    TimeoutException when nothing loaded within `timeout` seconds.
+    """
+    driver.set_script_timeout(timeout + 5)
+    start = time.monotonic()
+    status = driver.execute_async_script(_WAIT_READY_JS, STAT_IDS, int(quiet * 1000), int(timeout * 1000))
+    if status == "timeout":
+        raise TimeoutException(f"No results after {time.monotonic() - start:.1f}s")
+    return status
+
+def new_driver():
+    """
+    Start a headless Chrome and park it on the tikip.us search page.
+    """
+    opts = Options()
+    opts.add_argument("--headless=new")
+    driver = webdriver.Chrome(options=opts)
+    try:
+        driver.get(SEARCH_URL)
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+def quit_quietly(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+class DriverPool:
+    """
+    Bounded pool of long-lived drivers shared by worker threads.
+
+    At most `size` drivers exist at once. Drivers are started lazily on first
+    checkout, health-checked every time they are handed out and replaced when
+    the browser session has died. A driver returned after a failed task is
+    sent back to the search page before it is reused.
+    """
+
+    def __init__(self, size, factory=new_driver, log=None):
+        self.size = size
+        self._factory = factory
+        self._log = log or (lambda msg: None)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._live = set()
+        self._closed = False
+        self.created = 0
+        self.replaced = 0
+
+    def _create(self, timeout=None):
+        if timeout is None:
+            driver = self._factory()
+        else:
+            driver = self._create_within(timeout)
+        with self._lock:
+            self._live.add(driver)
+            self.created += 1
+        return driver
+
+    def _create_within(self, timeout):
+        # Chrome's startup cannot be interrupted, so it runs on its own
+        # thread; one that finishes too late is kept as an idle driver when
+        # there is room, and quit otherwise
+        box, started = {}, threading.Event()
+        state = {"late": False}
+        lock = threading.Lock()
+
+        def start():
+            try:
+                box["driver"] = self._factory()
+            except BaseException as e:
+                box["error"] = e
+            with lock:
+                started.set()
+                late = state["late"]
+            if late and "driver" in box:
+                self._adopt(box["driver"])
+
+        threading.Thread(target=start, daemon=True).start()
+        if not started.wait(timeout):
+            with lock:
+                if not started.is_set():
+                    state["late"] = True
+                    raise TimeoutException(f"Browser did not start within {timeout:.1f}s")
+        if "error" in box:
+            raise box["error"]
+        return box["driver"]
+
+    def _adopt(self, driver):
+        with self._lock:
+            keep = not self._closed and len(self._live) < self.size
+            if keep:
+                self._live.add(driver)
+                self.created += 1
+        if keep:
+            self._idle.put(driver)
+        else:
+            quit_quietly(driver)
+
+    def _discard(self, driver):
+        with self._lock:
+            self._live.discard(driver)
+        quit_quietly(driver)
+
+    def _healthy(self, driver):
+        # One cheap round trip. A dead session raises WebDriverException, a
+        # dead chromedriver urllib3's MaxRetryError or a ConnectionError, so
+        # any error counts as unhealthy.
+        try:
+            return driver.execute_script("return document.readyState") is not None
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        """
+        Check out a driver, starting one when none is idle. With a timeout,
+        waiting for a free slot and starting the browser together take at
+        most that many seconds, or TimeoutException is raised.
+        """
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutException(f"No free browser within {timeout:.1f}s")
+        try:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                return self._create(remaining)
+            if self._healthy(driver):
+                return driver
+            self._log("[pool] Replacing dead driver")
+            self._discard(driver)
+            with self._lock:
+                self.replaced += 1
+            return self._create(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, driver, failed=False):
+        try:
+            if self._closed:
+                self._discard(driver)
+                return
+            if failed:
+                try:
+                    driver.get(SEARCH_URL)
+                except Exception:
+                    self._discard(driver)
+                    return
+            self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            drivers = list(self._live)
+            self._live.clear()
+        for d in drivers:
+            quit_quietly(d)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ResultStore:
+    """
+    Append-only JSONL cache of scraped profiles keyed by username.
+
+    Every profile is written and flushed as soon as it is stored, so an
+    interrupted run keeps everything finished so far. When a username
+    appears more than once, the last line wins. `stored` holds the
+    usernames put since the store was opened, i.e. scraped in this run.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.stored = set()
+        needs_newline = False
+        if self.path.exists():
+            text = self.path.read_text(encoding="utf-8")
+            for line in text.splitlines():
+                try:
+                    entry = json.loads(line)
+                    self._entries[entry["username"]] = entry
+                except (ValueError, KeyError, TypeError):
+                    continue  # torn line from a killed run
+            needs_newline = text != "" and not text.endswith("\n")
+        self._file = open(self.path, "a", encoding="utf-8")
+        if needs_newline:
+            self._file.write("\n")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, uname, ttl=None):
+        """
+        Return the cached profile, or None when there is none or it is older
+        than `ttl` seconds.
+        """
+        entry = self._entries.get(uname)
+        if entry is None:
+            return None
+        if ttl is not None and time.time() - entry["scraped_at"] > ttl:
+            return None
+        return entry["profile"]
+
+    def scraped_at(self, uname):
+        """
+        When the cached profile was scraped (time.time()), or None.
+        """
+        entry = self._entries.get(uname)
+        return None if entry is None else entry["scraped_at"]
+
+    def put(self, uname, profile):
+        entry = {"username": uname, "scraped_at": time.time(), "profile": profile}
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self._entries[uname] = entry
+            self.stored.add(uname)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,182 @@
+import aiohttp
+import asyncio, random, time
+from tikip_common import STAT_IDS, normalize_bio_link
+from tikip_metrics import ProfileTimer
+
+# Experimental: there is no known public endpoint, so the caller passes the
+# API URL ("{}" is replaced by the username). profile_from_api assumes the
+# TikTok userInfo shape; it has only been checked against hand-written
+# fixtures, not recorded responses.
+# Throttling and server errors are retried; any other status goes straight
+# to the browser fallback
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class RateLimiter:
+    """
+    Async token bucket: at most `rate` requests per second, with bursts of up
+    to `burst` requests.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def _pick(d, *keys):
+    for k in keys:
+        if isinstance(d, dict) and d.get(k) not in (None, ""):
+            return d[k]
+    return None
+
+def _count(v):
+    # The page shows counts with thousands separators, e.g. "32,439"
+    if isinstance(v, (int, float)):
+        return f"{int(v):,}"
+    return "" if v is None else str(v).strip()
+
+def _date(v):
+    # 0 means never (e.g. a username that was never changed); the page
+    # leaves those fields empty. UTC is an assumption, not checked against
+    # what the page shows.
+    if isinstance(v, (int, float)):
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(v)) if v > 0 else ""
+    return "" if v is None else str(v).strip()
+
+def profile_from_api(uname, payload):
+    """
+    Map an API payload onto the scrapers' output schema. Accepts the TikTok
+    userInfo shape ({"userInfo": {"user": ..., "stats": ...}}) as well as the
+    same object without the userInfo wrapper. Returns None when the payload
+    holds no user.
+    """
+    info = payload.get("userInfo", payload) if isinstance(payload, dict) else None
+    user = info.get("user") if isinstance(info, dict) else None
+    if not isinstance(user, dict) or not _pick(user, "uniqueId", "nickname"):
+        return None
+    stats = info.get("stats") or info.get("statsV2") or {}
+    bio_link = user.get("bioLink") or {}
+    unique_id = _pick(user, "uniqueId") or ""
+    avatar = _pick(user, "avatarLarger", "avatarMedium", "avatarThumb") or ""
+    stat_keys = {
+        "followers": "followerCount",
+        "following": "followingCount",
+        "hearts": "heartCount",
+        "videos": "videoCount",
+        "friends": "friendCount",
+    }
+    return {
+        "input_username": uname,
+        "profile_header": {
+            "nickname": str(_pick(user, "nickname") or ""),
+            "username": f"@{unique_id}" if unique_id else "",
+            "profile_link": f"https://www.tiktok.com/@{unique_id}" if unique_id else "",
+        },
+        "avatar": {
+            "avatar_src": avatar,
+            "download_avatar_link": avatar,
+        },
+        "bio": {
+            "about": str(_pick(user, "signature") or "").strip(),
+            "bio_link": normalize_bio_link(_pick(bio_link, "link") if isinstance(bio_link, dict) else bio_link),
+        },
+        "profile_details": {
+            "user_id": str(_pick(user, "id") or ""),
+            "country": str(_pick(user, "region") or ""),
+            "language": str(_pick(user, "language") or ""),
+            "account_created": _date(_pick(user, "createTime")),
+            "nickname_modified": _date(_pick(user, "nickNameModifyTime")),
+            "username_modified": _date(_pick(user, "uniqueIdModifyTime")),
+        },
+        "stats": {k: _count(_pick(stats, stat_keys[k], stat_keys[k].replace("Count", "_count"))) for k in STAT_IDS},
+    }
+
+def _retry_delay(resp, attempt, backoff, max_backoff):
+    # Retry-After in seconds when the server sends one, otherwise
+    # exponential backoff with full jitter. The wait holds a concurrency
+    # slot, so a Retry-After above max_backoff falls back to the backoff.
+    try:
+        delay = max(0.0, float(resp.headers.get("Retry-After", "")))
+        if delay <= max_backoff:
+            return delay
+    except ValueError:
+        pass
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+async def _request(session, limiter, api_url, uname, log, retries, backoff, max_backoff):
+    # The payload, or None when the username should go to the browser
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        try:
+            async with session.get(api_url.format(uname)) as resp:
+                if resp.status in RETRY_STATUSES and attempt < retries:
+                    delay = _retry_delay(resp, attempt, backoff, max_backoff)
+                    log(f"[http] @{uname}: HTTP {resp.status}, retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                if resp.status != 200:
+                    log(f"[http] @{uname}: HTTP {resp.status}")
+                    return None
+                return await resp.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            log(f"[http] @{uname}: {type(e).__name__}: {e}")
+            return None
+
+async def _fetch_one(session, limiter, sem, api_url, uname, log, on_profile, metrics, retries, backoff,
+                     max_backoff):
+    async with sem:
+        timer = ProfileTimer(uname)
+        with timer.phase("request"):
+            payload = await _request(session, limiter, api_url, uname, log, retries, backoff, max_backoff)
+    profile = None if payload is None else profile_from_api(uname, payload)
+    if payload is not None and profile is None:
+        log(f"[http] @{uname}: no user in response")
+    if metrics:
+        metrics.add(timer, status="ok" if profile is not None else "fallback")
+    if profile is not None and on_profile:
+        on_profile(uname, profile)
+    return uname, profile
+
+async def _fetch_all(usernames, api_url, concurrency, rate, timeout, log, on_profile, metrics, retries, backoff,
+                     max_backoff):
+    limiter = RateLimiter(rate, burst=max(1, concurrency))
+    sem = asyncio.Semaphore(concurrency)
+    # One pooled, keep-alive connector for the whole run
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    headers = {"Accept": "application/json", "User-Agent": "Mozilla/5.0"}
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=headers) as session:
+        tasks = [_fetch_one(session, limiter, sem, api_url, u, log, on_profile, metrics, retries, backoff,
+                            max_backoff) for u in usernames]
+        return await asyncio.gather(*tasks)
+
+def fetch_profiles(usernames, api_url, concurrency=10, rate=5.0, timeout=30, log=print, on_profile=None,
+                   metrics=None, retries=2, backoff=1.0, max_backoff=30.0):
+    """
+    Fetch profiles over plain HTTP. Returns (profiles, failed) where failed
+    lists the usernames that should be retried with the browser.
+    on_profile(username, profile) is called as each profile arrives. With a
+    tikip_metrics.Metrics, every fetch is recorded with its request time,
+    as "ok" or as "fallback" when it goes to the browser.
+    Throttled (429) and 5xx responses are retried up to `retries` times,
+    waiting at most `max_backoff` seconds before each retry.
+    """
+    results = asyncio.run(_fetch_all(usernames, api_url, concurrency, rate, timeout, log, on_profile, metrics,
+                                     retries, backoff, max_backoff))
+    profiles = [p for _, p in results if p is not None]
+    failed = [u for u, p in results if p is None]
+    return profiles, failed
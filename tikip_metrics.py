@@ -0,0 +1,92 @@
+from contextlib import contextmanager
+from pathlib import Path
+import json, threading, time
+
+# Browser phases, then "request" for --engine http fetches
+PHASES = ["acquire", "page_load", "search", "results_wait", "extract", "request", "total"]
+
+def percentile(values, q):
+    """
+    Linear-interpolated percentile of an unsorted list, q in [0, 100].
+    """
+    if not values:
+        return 0.0
+    s = sorted(values)
+    k = (len(s) - 1) * q / 100
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+class ProfileTimer:
+    """
+    Collects the time one profile spends in each phase.
+    """
+
+    def __init__(self, username):
+        self.username = username
+        self.phases = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self):
+        self.phases["total"] = time.perf_counter() - self._start
+
+class Metrics:
+    """
+    Appends one JSON line per profile to `path` and summarizes latency per
+    phase and overall throughput at the end of a run.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._records = []
+        self._start = time.perf_counter()
+
+    def add(self, timer, status="ok"):
+        timer.finish()
+        rec = {
+            "ts": time.time(),
+            "username": timer.username,
+            "status": status,
+            **{k: round(v, 4) for k, v in timer.phases.items()},
+        }
+        with self._lock:
+            self._records.append(rec)
+            self._file.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def summary(self):
+        """
+        Return the summary as a list of text lines.
+        """
+        elapsed = time.perf_counter() - self._start
+        with self._lock:
+            records = list(self._records)
+        ok = [r for r in records if r["status"] == "ok"]
+        # An HTTP fetch that went to the browser is not a failure of its own;
+        # the browser attempt that follows is recorded separately
+        fallback = sum(1 for r in records if r["status"] == "fallback")
+        lines = [f"Profiles: {len(ok)} ok, {len(records) - len(ok) - fallback} failed"
+                 + (f", {fallback} sent to the browser" if fallback else "")
+                 + f" in {elapsed:.1f}s ({len(ok) / elapsed if elapsed else 0:.2f} profiles/s)"]
+        lines.append(f"{'phase':<14}{'n':>6}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+        for name in PHASES:
+            vals = [r[name] for r in ok if name in r]
+            if not vals:
+                continue
+            lines.append(f"{name:<14}{len(vals):>6}{sum(vals) / len(vals):>9.2f}"
+                         f"{percentile(vals, 50):>9.2f}{percentile(vals, 95):>9.2f}{percentile(vals, 99):>9.2f}")
+        return lines
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+import random, threading, time
+
+class AdaptiveLimit:
+    """
+    Concurrency limit that adapts to how the site is coping (AIMD).
+
+    Every attempt holds a slot. A failed or slow attempt halves the limit, at
+    most once per `cooldown` seconds. A run of successes as long as the
+    current limit raises it by one again, up to `maximum`.
+    """
+
+    def __init__(self, maximum, minimum=1, cooldown=10.0):
+        self.maximum = maximum
+        self.minimum = minimum
+        self.cooldown = cooldown
+        self.limit = maximum
+        self._active = 0
+        self._streak = 0
+        self._last_cut = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """
+        Wait for a slot, at most `timeout` seconds. Returns False when none
+        came free in time.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._active < self.limit, timeout):
+                return False
+            self._active += 1
+            return True
+
+    def release(self, healthy):
+        """
+        Free a slot. healthy=None (the slot was not used) leaves the limit
+        as it is.
+        """
+        with self._cond:
+            self._active -= 1
+            if healthy:
+                self._streak += 1
+                if self._streak >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self._streak = 0
+            elif healthy is not None:
+                self._streak = 0
+                now = time.monotonic()
+                if now - self._last_cut >= self.cooldown and self.limit > self.minimum:
+                    self.limit = max(self.minimum, self.limit // 2)
+                    self._last_cut = now
+            self._cond.notify_all()
+
+class Scheduler:
+    """
+    Runs fn(item, timeout) for every item on a thread pool with a per-item
+    deadline, retries with exponential backoff and full jitter, and an
+    adaptive concurrency limit. One failing item never stops the others:
+    run() returns the results and a report of the items that gave up.
+    """
+
+    def __init__(self, workers, attempts=3, task_timeout=120.0, backoff=2.0,
+                 max_backoff=30.0, slow_after=20.0, log=None):
+        self.workers = workers
+        self.attempts = attempts
+        self.task_timeout = task_timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.slow_after = slow_after
+        self.limit = AdaptiveLimit(workers)
+        self._log = log or (lambda msg: None)
+
+    def _delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def _run_one(self, fn, item):
+        deadline = time.monotonic() + self.task_timeout
+        errors = []
+        tried = 0
+        for attempt in range(1, self.attempts + 1):
+            # Waiting for a slot counts against the deadline, and the attempt
+            # only gets what is left once it holds one
+            if not self.limit.acquire(timeout=max(0, deadline - time.monotonic())):
+                errors.append("deadline exceeded")
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.limit.release(healthy=None)
+                errors.append("deadline exceeded")
+                break
+            tried += 1
+            start = time.monotonic()
+            try:
+                result = fn(item, remaining)
+            except Exception as e:
+                self.limit.release(healthy=False)
+                errors.append(f"{type(e).__name__}: {e}".strip())
+                self._log(f"[retry] {item}: attempt {attempt}/{self.attempts} failed: {errors[-1]}")
+            else:
+                self.limit.release(healthy=time.monotonic() - start < self.slow_after)
+                return True, result
+            if attempt < self.attempts:
+                delay = self._delay(attempt)
+                if time.monotonic() + delay >= deadline:
+                    errors.append("deadline exceeded")
+                    break
+                time.sleep(delay)
+        return False, {"attempts": tried, "errors": errors}
+
+    def run(self, items, fn):
+        """
+        Returns (results, failed): dicts keyed by item, holding fn's return
+        value and the failure report respectively.
+        """
+        results, failed = {}, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as ex:
+            futures = {item: ex.submit(self._run_one, fn, item) for item in dict.fromkeys(items)}
+            for item, fut in futures.items():
+                ok, value = fut.result()
+                (results if ok else failed)[item] = value
+        if self.limit.limit < self.workers:
+            self._log(f"[sched] Concurrency ended at {self.limit.limit}/{self.workers}")
+        return results, failed
@@ -1,7 +1,12 @@
 #!/usr/bin/env python3
 import os
+import re
+import sys
 import json
-from html import escape
+import argparse
+from counts import parse_count
+from viewcache import MANIFEST_NAME, ViewCache
+from workers import resolve_jobs, run_tasks
 
 FOLDERS = [
     "bbb",
@@ -27,32 +32,22 @@ FOLDERS = [
     "cu",
 ]
 
-def parse_views(value):
+def item_views(obj, errors=None):
     """
-    Convert the 'views' field to an integer.
-    Accepts ints, floats, numeric strings, strings with commas, and k/m suffixes.
+    Views of a single list entry, or None when the entry is skipped
+    (not an object, or no url/link). Unparseable view values count as 0
+    and are appended to errors.
     """
-    if value is None:
-        return 0
-    if isinstance(value, int):
-        return value
-    if isinstance(value, float):
-        return int(value)
-    s = str(value).strip()
-    s = s.replace(",", "").replace(" ", "")
-    if not s:
-        return 0
-    low = s.lower()
-    try:
-        if low.endswith('k'):
-            return int(float(low[:-1]) * 1_000)
-        if low.endswith('m'):
-            return int(float(low[:-1]) * 1_000_000)
-        return int(float(low))
-    except ValueError:
-        return 0
-
-def extract_items(data):
+    if not isinstance(obj, dict):
+        return None
+    url = obj.get("url")
+    if url is None and "link" in obj:
+        url = obj.get("link")
+    if url is None:
+        return None
+    return parse_count(obj.get("views"), errors=errors)
+
+def extract_items(data, errors=None):
     """
     Normalize supported JSON shapes into a list of {url, views}.
     Supports:
@@ -82,43 +77,180 @@ def extract_items(data):
             url = obj.get("link")
         if url is None:
             continue
-        items.append({"url": str(url), "views": parse_views(views_raw)})
+        items.append({"url": str(url), "views": parse_count(views_raw, errors=errors)})
     return items
 
-def read_json_file(path):
+CHUNK_SIZE = 1 << 16
+_WS = re.compile(r"[ \t\n\r]*")
+# Characters that can continue a number, so one decoded up to them may
+# have been cut off by the chunk boundary
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_decoder = json.JSONDecoder()
+
+class _Reader:
+    """
+    Sliding text buffer over a file. Consumed text is dropped whenever more
+    is read, so memory is bounded by one chunk plus the largest element.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def more(self):
+        chunk = self.f.read(CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skip JSON whitespace and return the next character ("" at EOF).
+        """
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ""
+
+    def value(self):
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+                continue
+            # A number cut off by the chunk boundary decodes "successfully"
+            # as a prefix: "1" of "1.5", also when the "." was read but not
+            # the digits after it. Only trust it once a character follows
+            # that cannot continue it.
+            if _NUMBER_TAIL.match(self.buf, end).end() == len(self.buf) and not self.eof and self.more():
+                continue
+            self.pos = end
+            return obj
+
+def iter_json_array(f):
+    """
+    Yield the elements of a top-level JSON array one at a time. Raises
+    ValueError on malformed input, including trailing data after the array.
+    The caller must have checked that the document starts with "[".
+    """
+    r = _Reader(f)
+    r.peek()
+    r.pos += 1
+    if r.peek() == "]":
+        r.pos += 1
+    else:
+        while True:
+            if r.peek() == "":
+                raise ValueError("unexpected end of JSON array")
+            yield r.value()
+            c = r.peek()
+            r.pos += 1
+            if c == "]":
+                break
+            if c != ",":
+                raise ValueError("expected ',' or ']' in JSON array")
+    if r.peek() != "":
+        raise ValueError("extra data after JSON array")
+
+def sum_views_in_file(path):
+    """
+    Return (item_count, view_total, bad_values) for one JSON file, or None
+    when it cannot be read or parsed. Top-level arrays, the shape of all our view dumps, are
+    summed while streaming so only one element is in memory at a time.
+    Other shapes go through the full parse and extract_items.
+    """
     try:
+        errors = []
         with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            first = f.read(CHUNK_SIZE)
+            f.seek(0)
+            if first.lstrip(" \t\n\r")[:1] != "[":
+                data = json.load(f)
+                items = extract_items(data, errors)
+                return len(items), sum(it["views"] for it in items), len(errors)
+            count = total = 0
+            for obj in iter_json_array(f):
+                views = item_views(obj, errors)
+                if views is not None:
+                    count += 1
+                    total += views
+            return count, total, len(errors)
     except Exception:
         return None
 
-def sum_views_in_folder(folder):
-    total = 0
-    file_counts = 0
+def list_json_files(folder):
+    paths = []
     for root, _, files in os.walk(folder):
         for name in files:
-            if not name.lower().endswith(".json"):
-                continue
-            file_counts += 1
-            full = os.path.join(root, name)
-            data = read_json_file(full)
-            if data is None:
-                continue
-            for item in extract_items(data):
-                total += item["views"]
-    return total, file_counts
+            if name.lower().endswith(".json"):
+                paths.append(os.path.join(root, name))
+    return paths
 
-def main():
-    grand_total = 0
-    per_folder = {}
+CACHE_KIND = "totalviews"
 
-    for folder in FOLDERS:
+def scan_folders(folders, jobs=1, cache=None):
+    """
+    Sum the views of every folder. With jobs > 1 the files of all folders
+    are parsed on a process pool and the subtotals merged per folder. With
+    a ViewCache only new or changed files are parsed.
+    Returns {folder: {"total", "files", "exists", "bad"}}, where bad counts
+    view values that could not be parsed and were summed as 0.
+    """
+    per_folder = {}
+    tasks = []
+    for folder in folders:
         if not os.path.isdir(folder):
-            per_folder[folder] = {"total": 0, "files": 0, "exists": False}
+            per_folder[folder] = {"total": 0, "files": 0, "exists": False, "bad": 0}
             continue
-        subtotal, files = sum_views_in_folder(folder)
-        per_folder[folder] = {"total": subtotal, "files": files, "exists": True}
-        grand_total += subtotal
+        files = list_json_files(folder)
+        per_folder[folder] = {"total": 0, "files": len(files), "exists": True, "bad": 0}
+        tasks.extend((folder, path) for path in files)
+
+    # Unreadable files are cached as False so they are not retried until
+    # they change
+    results = {}
+    if cache is not None:
+        for _, path in tasks:
+            hit = cache.lookup(path, CACHE_KIND)
+            if hit is not None:
+                results[path] = hit
+    paths = [(path,) for _, path in tasks if path not in results]
+    for (path,), result, _ in run_tasks(sum_views_in_file, paths, jobs):
+        results[path] = result or False
+        if cache is not None:
+            cache.store(path, CACHE_KIND, results[path])
+
+    for folder, path in tasks:
+        result = results[path]
+        if result:
+            per_folder[folder]["total"] += result[1]
+            per_folder[folder]["bad"] += result[2]
+    return per_folder
+
+def main():
+    parser = argparse.ArgumentParser(description="Sum TikTok views per party folder.")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="worker processes for parsing (0 = one per CPU core)")
+    parser.add_argument("--cache", default=MANIFEST_NAME,
+                        help=f"manifest of per-file results reused between runs (default: {MANIFEST_NAME})")
+    parser.add_argument("--no-cache", action="store_true", help="parse every file and leave the manifest alone")
+    args = parser.parse_args()
+    jobs = resolve_jobs(args.jobs)
+
+    cache = None if args.no_cache else ViewCache(args.cache)
+    per_folder = scan_folders(FOLDERS, jobs, cache)
+    if cache is not None:
+        cache.save()
+    grand_total = sum(info["total"] for info in per_folder.values())
 
     # Print a concise report
     print("Per-folder totals:")
@@ -127,6 +259,10 @@ def main():
         status = "OK" if info["exists"] else "MISSING"
         print(f"- {folder}: {info['total']:,} views from {info['files']} files [{status}]")
     print(f"\nGrand total views: {grand_total:,}")
+    bad = {folder: info["bad"] for folder, info in per_folder.items() if info["bad"]}
+    if bad:
+        print(f"Warning: {sum(bad.values())} view values could not be parsed and were counted as 0 "
+              f"({', '.join(f'{k}: {v}' for k, v in bad.items())})", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
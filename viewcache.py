@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import os
+import json
+import hashlib
+
+MANIFEST_NAME = ".viewcache"
+VERSION = 2
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class ViewCache:
+    """
+    Persistent manifest of per-file parse results, keyed by path.
+
+    Each entry records the file's mtime, size and SHA-256 together with the
+    results computed from it, stored per `kind` so totalviews.py and views.py
+    can keep their own summaries of the same file. A file whose mtime and
+    size are unchanged is a hit without being read. When only the mtime
+    moved, the content hash decides. Anything else is parsed again.
+    """
+
+    def __init__(self, path=MANIFEST_NAME):
+        self.path = path
+        # Keys are relative to the manifest, so scripts run from different
+        # directories share entries
+        self.root = os.path.dirname(os.path.abspath(path))
+        self.files = {}
+        self.hits = 0
+        self.misses = 0
+        self._seen = set()
+        self._dirty = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == VERSION:
+                self.files = data.get("files", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def _entry(self, path):
+        """
+        Return the up-to-date entry for path, dropping stale results.
+        """
+        st = os.stat(path)
+        key = os.path.relpath(os.path.abspath(path), self.root)
+        self._seen.add(key)
+        entry = self.files.get(key)
+        if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+            return entry
+        digest = file_hash(path)
+        if not entry or entry["sha256"] != digest or entry["size"] != st.st_size:
+            entry = {"results": {}}
+        entry.update({"mtime_ns": st.st_mtime_ns, "size": st.st_size, "sha256": digest})
+        self.files[key] = entry
+        self._dirty = True
+        return entry
+
+    def lookup(self, path, kind):
+        """
+        Return the cached result of `kind` for path, or None on a miss.
+        """
+        result = self._entry(path)["results"].get(kind)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def store(self, path, kind, result):
+        self._entry(path)["results"][kind] = result
+        self._dirty = True
+
+    def get(self, path, kind, compute):
+        """
+        Return compute(path), reusing the cached value when the file is
+        unchanged. None results are not cached.
+        """
+        result = self.lookup(path, kind)
+        if result is None:
+            result = compute(path)
+            if result is not None:
+                self.store(path, kind, result)
+        return result
+
+    def save(self):
+        """
+        Write the manifest, forgetting files that were not seen this run.
+        """
+        stale = set(self.files) - self._seen
+        if not self._dirty and not stale:
+            return
+        for key in stale:
+            del self.files[key]
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "files": self.files}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self._dirty = False
@@ -1,79 +1,127 @@
 #!/usr/bin/env python3
 import os
-import json
-from glob import glob
+import sys
+import heapq
+import argparse
+from glob import glob, escape as glob_escape
 from html import escape
+from operator import attrgetter
+from counts import parse_count
+from htmlstream import ROWS_SUFFIX, pager_html, rows_dir, write_joined, write_paged_rows
+from totalviews import CHUNK_SIZE, iter_json_array
+from viewcache import MANIFEST_NAME, ViewCache
 
-def parse_views(value):
-    """
-    Convert the 'views' field to an integer.
-    Accepts ints, floats, numeric strings, and strings with commas or k/m suffixes.
-    """
-    if value is None:
-        return 0
-    if isinstance(value, int):
-        return value
-    if isinstance(value, float):
-        return int(value)
-    s = str(value).strip()
-    s = s.replace(",", "").replace(" ", "")
-    if not s:
-        return 0
-    # suffixes like '1.4m', '25k'
-    low = s.lower()
-    try:
-        if low.endswith('k'):
-            return int(float(low[:-1]) * 1_000)
-        if low.endswith('m'):
-            return int(float(low[:-1]) * 1_000_000)
-        return int(float(low))
-    except ValueError:
-        return 0
+TOP_N = 100
+
+class Row:
+    """
+    One link in the overview. Slots keep the per-row cost to three references.
+    """
+    __slots__ = ("url", "views", "source")
+
+    def __init__(self, url, views, source):
+        self.url = url
+        self.views = views
+        self.source = source
 
-def load_items_from_json(filepath):
+by_views = attrgetter("views")
+
+def iter_rows(filepath, errors=None):
     """
-    Expect a JSON array of objects like:
+    Stream the entries of a JSON array of objects like:
     [{"views": "181600", "url": "https://..."}]
-    Returns a list of dicts { "url": str, "views": int, "source": filename }.
+    yielding a Row per entry that has a url. Yields nothing when the file is
+    not an array; raises when it cannot be read or parsed. View values that
+    do not parse count as 0 and are appended to errors.
+    """
+    base = os.path.basename(filepath)
+    with open(filepath, "r", encoding="utf-8") as f:
+        first = f.read(CHUNK_SIZE)
+        if first.lstrip(" \t\n\r")[:1] != "[":
+            return
+        f.seek(0)
+        for obj in iter_json_array(f):
+            if not isinstance(obj, dict):
+                continue
+            url = obj.get("url")
+            if not url:
+                continue
+            yield Row(str(url), parse_count(obj.get("views"), errors=errors), base)
+
+def summarize_file(filepath, top_n=TOP_N):
+    """
+    Everything the overview needs from one file: its entry count, view
+    total, number of unparseable view values and its own top_n links as
+    [url, views] pairs, found with a bounded heap so the file's entries are
+    never held all at once.
+    heapq.nlargest matches sorted(..., reverse=True)[:n] including ties,
+    and the overall top_n always lies within the union of the per-file
+    lists, so merging them gives the same ranking as sorting every item.
+    A file that cannot be read or parsed counts as empty.
     """
-    items = []
+    count = 0
+    total = 0
+    errors = []
+
+    def counted(rows):
+        nonlocal count, total
+        for row in rows:
+            count += 1
+            total += row.views
+            yield row
+
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        top = heapq.nlargest(top_n, counted(iter_rows(filepath, errors)), key=by_views)
     except Exception:
-        return items
+        return {"count": 0, "total": 0, "bad": 0, "top": []}
+    return {"count": count, "total": total, "bad": len(errors), "top": [[r.url, r.views] for r in top]}
+
+LINK_TABLE_HEAD = """  <table>
+    <thead>
+      <tr>
+        <th>#</th>
+        <th>URL</th>
+        <th>Views</th>
+        <th>Source file</th>
+      </tr>
+    </thead>
+    <tbody>
+      """
 
-    if not isinstance(data, list):
-        return items
+def link_row(i, it):
+    return (
+        f"<tr>"
+        f"<td>{i}</td>"
+        f"<td><a href=\"{escape(it.url)}\" target=\"_blank\" rel=\"noopener noreferrer\">{escape(it.url)}</a></td>"
+        f"<td>{it.views:,}</td>"
+        f"<td>{escape(it.source)}</td>"
+        f"</tr>"
+    )
 
-    base = os.path.basename(filepath)
-    for obj in data:
-        if not isinstance(obj, dict):
-            continue
-        url = obj.get("url")
-        views_raw = obj.get("views")
-        if not url:
-            continue
-        views = parse_views(views_raw)
-        items.append({"url": str(url), "views": views, "source": base})
-    return items
-
-def build_html(total_views, items, top_n=100):
-    """
-    Build an HTML overview showing the total and the most viewed links.
-    """
-    rows = []
-    for i, it in enumerate(items[:top_n], start=1):
-        rows.append(
-            f"<tr>"
-            f"<td>{i}</td>"
-            f"<td><a href=\"{escape(it['url'])}\" target=\"_blank\" rel=\"noopener noreferrer\">{escape(it['url'])}</a></td>"
-            f"<td>{it['views']:,}</td>"
-            f"<td>{escape(it['source'])}</td>"
-            f"</tr>"
-        )
-
-    html = f"""<!DOCTYPE html>
+LINK_COLUMNS = ("text", "link", "num", "text")
+
+def write_link_table(f, items, top_n, chunk_dir=None):
+    """
+    The most viewed links table, rows only from the first page on when
+    chunk_dir is given.
+    """
+    f.write(LINK_TABLE_HEAD)
+    pages, count = write_paged_rows(
+        f, enumerate(items[:top_n], start=1), lambda p: link_row(*p),
+        lambda p: [p[0], p[1].url, p[1].views, p[1].source], chunk_dir)
+    f.write("""
+    </tbody>
+  </table>
+""")
+    f.write(pager_html(chunk_dir, pages, count, LINK_COLUMNS))
+
+def write_html(f, total_views, items, top_n=100, chunk_dir=None):
+    """
+    Stream an HTML overview showing the total and the most viewed links to
+    the text file f, row by row. With chunk_dir, links past the first page
+    are written there as JSON and paged through client-side.
+    """
+    f.write(f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="utf-8" />
@@ -96,40 +144,182 @@ def build_html(total_views, items, top_n=100):
 
   <h2>Most viewed links</h2>
   <p class="muted">Top {min(top_n, len(items))} by view count.</p>
+""")
+    write_link_table(f, items, top_n, chunk_dir)
+    f.write("""</body>
+</html>""")
+
+def summarize_folder(folder, cache, top_n=TOP_N, source_prefix=""):
+    """
+    Combine the per-file summaries of every *.json directly in folder,
+    through the manifest when cache is given.
+    Returns (total_views, entries, files, top_rows, bad_values).
+    """
+    json_files = sorted(glob(os.path.join(glob_escape(folder), "*.json")))
+    total_views = 0
+    entries = 0
+    bad = 0
+
+    def file_tops():
+        nonlocal total_views, entries, bad
+        for fp in json_files:
+            if cache is None:
+                summary = summarize_file(fp, top_n)
+            else:
+                summary = cache.get(fp, f"views_top{top_n}", lambda path: summarize_file(path, top_n))
+            total_views += summary["total"]
+            entries += summary["count"]
+            bad += summary["bad"]
+            source = source_prefix + os.path.basename(fp)
+            for url, views in summary["top"]:
+                yield Row(url, views, source)
+
+    top_rows = heapq.nlargest(top_n, file_tops(), key=by_views)
+    return total_views, entries, len(json_files), top_rows, bad
+
+def warn_bad(bad, where):
+    if bad:
+        print(f"Warning: {bad} view values in {where} could not be parsed and were counted as 0.", file=sys.stderr)
+
+def party_row(name, info):
+    return (
+        f"<tr>"
+        f"<td><a href=\"{escape(name)}.html\">{escape(name)}</a></td>"
+        f"<td>{info['total']:,}</td>"
+        f"<td>{info['files']}</td>"
+        f"<td>{info['entries']:,}</td>"
+        f"</tr>"
+    )
+
+def write_tree_html(f, parties, total_views, items, top_n=100, chunk_dir=None):
+    """
+    Stream the cross-party overview to the text file f: one row per party
+    plus the most viewed links over all parties.
+    """
+    f.write(f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8" />
+<meta name="viewport" content="width=device-width, initial-scale=1" />
+<title>TikTok Overview: all parties</title>
+<style>
+  body {{ font-family: system-ui, -apple-system, Segoe UI, Roboto, Arial, sans-serif; margin: 2rem; }}
+  h1, h2 {{ margin: 0.5rem 0; }}
+  .total {{ font-size: 1.25rem; margin: 1rem 0; }}
+  table {{ border-collapse: collapse; width: 100%; margin-bottom: 2rem; }}
+  th, td {{ border: 1px solid #ddd; padding: 8px; }}
+  th {{ background: #f5f5f5; text-align: left; }}
+  tr:nth-child(even) {{ background: #fafafa; }}
+  .muted {{ color: #666; font-size: 0.9rem; }}
+</style>
+</head>
+<body>
+  <h1>TikTok Overview: all parties</h1>
+  <div class="total">Total views across all parties: <strong>{total_views:,}</strong></div>
+
+  <h2>Views per party</h2>
   <table>
     <thead>
       <tr>
-        <th>#</th>
-        <th>URL</th>
+        <th>Party</th>
         <th>Views</th>
-        <th>Source file</th>
+        <th>Accounts</th>
+        <th>Videos</th>
       </tr>
     </thead>
     <tbody>
-      {''.join(rows)}
+      """)
+    ranked = sorted(parties.items(), key=lambda kv: kv[1]["total"], reverse=True)
+    write_joined(f, (party_row(name, info) for name, info in ranked))
+    f.write(f"""
     </tbody>
   </table>
-</body>
-</html>"""
-    return html
 
-def main():
-    # Pick up every .json file in the current directory
-    json_files = sorted(glob("*.json"))
+  <h2>Most viewed links</h2>
+  <p class="muted">Top {min(top_n, len(items))} by view count.</p>
+""")
+    write_link_table(f, items, top_n, chunk_dir)
+    f.write("""</body>
+</html>""")
+
+def write_page(path, write, *args, **kwargs):
+    with open(path, "w", encoding="utf-8") as f:
+        write(f, *args, chunk_dir=rows_dir(path), **kwargs)
+
+def party_names(root):
+    # Row chunk folders of the pages themselves are not parties
+    return [
+        name for name in sorted(os.listdir(root))
+        if os.path.isdir(os.path.join(root, name)) and not name.endswith(ROWS_SUFFIX)
+    ]
+
+def build_party(root, name, cache=None, top_n=TOP_N):
+    """
+    Write root/<name>.html from root/<name>/*.json. Returns the party's
+    overview entry and top rows, or None when the folder has no files.
+    """
+    folder = os.path.join(root, name)
+    total_views, entries, files, top_rows, bad = summarize_folder(folder, cache, top_n)
+    if not files:
+        return None
+    warn_bad(bad, folder)
+    out_path = os.path.join(root, f"{name}.html")
+    write_page(out_path, write_html, total_views, top_rows, top_n=top_n)
+    print(f"Wrote {out_path} with total views = {total_views:,} and {entries} entries.")
+    return {"total": total_views, "entries": entries, "files": files}, top_rows
+
+def build_overview(root, summaries, top_n=TOP_N):
+    """
+    Write root/overview.html from {party: (info, top_rows)}.
+    """
+    parties = {name: info for name, (info, _) in summaries.items()}
+    grand_total = sum(info["total"] for info in parties.values())
+    all_tops = (Row(r.url, r.views, f"{name}/{r.source}") for name, (_, rows) in summaries.items() for r in rows)
+    top_items = heapq.nlargest(top_n, all_tops, key=by_views)
+    out_path = os.path.join(root, "overview.html")
+    write_page(out_path, write_tree_html, parties, grand_total, top_items, top_n=top_n)
+    print(f"Wrote {out_path} with {len(parties)} parties and total views = {grand_total:,}.")
 
-    all_items = []
-    for fp in json_files:
-        all_items.extend(load_items_from_json(fp))
+def build_tree(root, top_n=TOP_N):
+    """
+    One pass over root/<party>/*.json: writes root/<party>.html for every
+    party folder and root/overview.html across all of them, sharing one
+    manifest (root/.viewcache) with totalviews.py.
+    """
+    cache = ViewCache(os.path.join(root, MANIFEST_NAME))
+    summaries = {}
+    for name in party_names(root):
+        result = build_party(root, name, cache, top_n)
+        if result is not None:
+            summaries[name] = result
+    cache.save()
+    build_overview(root, summaries, top_n)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the TikTok views overview pages.")
+    parser.add_argument("--tree", metavar="DIR",
+                        help="build DIR/<party>.html for every party folder in DIR plus DIR/overview.html; "
+                             "without it, every .json file in the current directory goes into overview.html")
+    parser.add_argument("--top", type=int, default=TOP_N,
+                        help=f"number of most viewed links to list (default: {TOP_N}); links past the first "
+                             "page are written as JSON chunks next to the page and paged through in the browser")
+    args = parser.parse_args()
+    if args.top < 1:
+        parser.error("--top must be at least 1")
+    if args.tree:
+        build_tree(args.tree, args.top)
+        return
 
-    total_views = sum(it["views"] for it in all_items)
-    all_items.sort(key=lambda x: x["views"], reverse=True)
+    # Unchanged files are summarized from the manifest without parsing
+    cache = ViewCache()
+    total_views, entries, _, top_items, bad = summarize_folder(".", cache, args.top)
+    cache.save()
+    warn_bad(bad, "this folder")
 
-    html = build_html(total_views, all_items, top_n=100)
     out_path = "overview.html"
-    with open(out_path, "w", encoding="utf-8") as f:
-        f.write(html)
+    write_page(out_path, write_html, total_views, top_items, top_n=args.top)
 
-    print(f"Wrote {out_path} with total views = {total_views:,} and {len(all_items)} entries.")
+    print(f"Wrote {out_path} with total views = {total_views:,} and {entries} entries.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+def resolve_jobs(jobs):
+    """
+    A --jobs value as a worker count: 0 or less means one per CPU core.
+    """
+    return jobs if jobs > 0 else (os.cpu_count() or 1)
+
+def call(fn, args=(), kwargs=None):
+    """
+    fn(*args, **kwargs) as (result, None), or (None, "Type: message") when
+    it raises, so one bad task is reported instead of ending the run.
+    """
+    try:
+        return fn(*args, **(kwargs or {})), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def _call(job):
+    # Module-level so the process pool can pickle it
+    return call(*job)
+
+def submit(ex, fn, args=(), kwargs=None):
+    """
+    call(fn, args, kwargs) on the executor ex; the future's result is the
+    (result, error) pair.
+    """
+    return ex.submit(_call, (fn, args, kwargs))
+
+def run_tasks(fn, tasks, jobs=1):
+    """
+    Run fn(*task) for every tuple in tasks, on a process pool when jobs > 1
+    and there is more than one task, else in this process. Yields
+    (task, result, error) in task order as the results come in; error is
+    None or the "Type: message" of what fn raised.
+    """
+    tasks = list(tasks)
+    if jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as ex:
+            # A few chunks per worker keeps the pool busy without paying
+            # one round trip per small task
+            results = ex.map(_call, [(fn, task) for task in tasks], chunksize=max(1, len(tasks) // (jobs * 4)))
+            for task, (result, error) in zip(tasks, results):
+                yield task, result, error
+    else:
+        for task in tasks:
+            result, error = call(fn, task)
+            yield task, result, error